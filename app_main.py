@@ -11,6 +11,8 @@ import applications
 from common import db
 from common import ma
 from common import login_manager
+from common.profiler import init_profiler
+from common.query_stats import init_query_stats
 from config import app_config, SYSTEM_ADMINISTRATOR, ROLES_ABBREVIATION
 
 
@@ -23,6 +25,10 @@ def create_app():
     login_manager.init_app(app)
     Security(app, applications.user_datastore)
     applications.configure_blueprints(app)
+    # 请求维度的数据库查询次数、耗时统计
+    init_query_stats(app)
+    # 请求携带管理员口令时记录该请求的 cProfile 和调用栈采样
+    init_profiler(app)
     return app
 
 
@@ -57,5 +63,47 @@ def before_first():
     db.session.commit()
 
 
+@manager.option("-s", "--store_ids", dest="store_ids", type=int, nargs="*")
+@manager.option("-d", "--safety_days", dest="safety_days", type=int)
+@manager.option("-w", "--workers", dest="max_workers", type=int)
+@manager.option("-c", "--chunk_size", dest="chunk_size", type=int)
+def optimize_stores(
+    store_ids=None, safety_days=None, max_workers=None, chunk_size=None
+):
+    """
+    多进程并行批量生成门店初始化优化结果，并输出每个门店的计算耗时
+    （celery worker 为守护进程不能创建子进程池，多进程计算通过命令行执行）
+    """
+    from applications.IR.optimization.service import BatchOptimizationService
+    from replenish.runner import ParallelReplenishRunner
+
+    runner = ParallelReplenishRunner(max_workers, chunk_size)
+    order_ids = BatchOptimizationService(
+        store_ids, safety_days
+    ).gen_init_optimizations(runner=runner)
+
+    for store_id, elapsed in sorted(runner.timings.items()):
+        print(
+            "store {}: order {}, {:.3f}s".format(
+                store_id, order_ids[store_id], elapsed
+            )
+        )
+    print(
+        "total stores: {}, compute time: {:.3f}s".format(
+            len(runner.timings), sum(runner.timings.values())
+        )
+    )
+
+
+@manager.option("-s", "--store_ids", dest="store_ids", type=int, nargs="*")
+def refresh_inventory_snapshot(store_ids=None):
+    """
+    重建门店（默认全部门店）最新库存快照，用于快照表初始化
+    """
+    from applications.IR.invoicing.service import StoreInventoryService
+
+    StoreInventoryService.refresh_snapshot(store_ids)
+
+
 if __name__ == "__main__":
     manager.run()
@@ -0,0 +1,138 @@
+# coding: utf-8
+"""
+读多写少接口的响应缓存，前端轮询的接口结果缓存在 redis 中，
+由写数据的 service 按命名空间主动失效
+"""
+import functools
+import hashlib
+import json
+
+import pandas as pd
+from flask import request
+
+from applications.IR.api.config import (
+    RESPONSE_CACHE_EXPIRE_SECONDS,
+    RESPONSE_CACHE_GENERATION_REDIS_KEY,
+    RESPONSE_CACHE_REDIS_KEY,
+)
+from common import redis_client
+from common.json_serializers import JSONSerializer
+
+# 缓存值中 dataframe 的标记 key，命中时还原为 dataframe
+DATAFRAME_CACHE_KEY = "__dataframe__"
+
+
+class ResponseCacheService:
+    @staticmethod
+    def generation_key(namespace):
+        return RESPONSE_CACHE_GENERATION_REDIS_KEY.format(
+            namespace=namespace.value
+        )
+
+    @classmethod
+    def key(cls, namespace):
+        """
+        根据当前请求的 endpoint、路由参数和 query 参数，以及当前预测版本生成缓存 key，
+        命名空间失效代数和预测版本在一次 redis pipeline 中读取
+        """
+        # api 模块被 configuration 模块依赖，这里引用 configuration 配置避免循环引用
+        from applications.IR.configuration import config as configuration_config
+
+        pipe = redis_client.pipeline()
+        pipe.get(cls.generation_key(namespace))
+        pipe.hget(
+            configuration_config.CONFIGURATION_REDIS_KEY,
+            configuration_config.CONFIGURATION_VERSION_KEY,
+        )
+        generation, version = pipe.execute()
+
+        request_args = json.dumps(
+            {
+                "view_args": request.view_args,
+                "args": request.args.to_dict(flat=False),
+            },
+            sort_keys=True,
+        )
+        return RESPONSE_CACHE_REDIS_KEY.format(
+            namespace=namespace.value,
+            generation=generation or 0,
+            endpoint=request.endpoint,
+            version=version,
+            digest=hashlib.md5(request_args.encode()).hexdigest(),
+        )
+
+    @staticmethod
+    def dumps(result):
+        """
+        dataframe 以 split 格式（列名、数据）和列类型缓存，命中时还原为相同类型的 dataframe，
+        再由请求 Accept 对应的 representation 序列化，各返回格式共用一份缓存；
+        其他结果直接 json 序列化
+        """
+        if not isinstance(result, pd.DataFrame):
+            return json.dumps(result)
+        return '{{"{}": {{"dtypes": {}, "table": {}}}}}'.format(
+            DATAFRAME_CACHE_KEY,
+            json.dumps(
+                {column: str(dtype) for column, dtype in result.dtypes.items()}
+            ),
+            JSONSerializer.dumps_df(result, orient="split"),
+        )
+
+    @staticmethod
+    def loads(value):
+        data = json.loads(value)
+        if not (isinstance(data, dict) and DATAFRAME_CACHE_KEY in data):
+            return data
+        cached = data[DATAFRAME_CACHE_KEY]
+        df = pd.DataFrame(
+            cached["table"]["data"], columns=cached["table"]["columns"]
+        )
+        return df.astype(cached["dtypes"])
+
+    @classmethod
+    def set(cls, key, result, expire):
+        # 只缓存可以 json 序列化的接口数据
+        try:
+            value = cls.dumps(result)
+        except TypeError:
+            return
+        redis_client.set(key, value, ex=expire)
+
+    @classmethod
+    def invalidate(cls, *namespaces):
+        """
+        失效命名空间下所有接口缓存：自增失效代数，之后的请求生成新的缓存 key
+        """
+        pipe = redis_client.pipeline()
+        for namespace in namespaces:
+            pipe.incr(cls.generation_key(namespace))
+        pipe.execute()
+
+
+def cached_response(namespace, expire=RESPONSE_CACHE_EXPIRE_SECONDS):
+    """
+    flask_restful Resource 方法的响应缓存装饰器，eg:
+
+        @cached_response(RESPONSE_CACHE_NAMESPACE.STORE)
+        def get(self):
+            ...
+
+    只缓存 dict、list、dataframe 类型的结果，(data, status_code) tuple、Response 等不缓存
+    """
+
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            key = ResponseCacheService.key(namespace)
+            cached = redis_client.get(key)
+            if cached is not None:
+                return ResponseCacheService.loads(cached)
+
+            result = method(*args, **kwargs)
+            if isinstance(result, (dict, list, pd.DataFrame)):
+                ResponseCacheService.set(key, result, expire)
+            return result
+
+        return wrapper
+
+    return decorator
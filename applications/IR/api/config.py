@@ -1,4 +1,6 @@
 # coding: utf-8
+import enum
+
 from config import BASEDIR
 
 
@@ -25,3 +27,24 @@ TEMPLATE_FILE_NAME = {**DYNAMIC_DATA_FILE_NAME, **STATIC_DATA_FILE_NAME}
 TEMPLATE_FILE_DIR = BASEDIR + "/templates"
 TMP_SAVE_PATH = TEMPLATE_FILE_DIR + "/tmp"
 CONFIRM_SAVE_PATH = TEMPLATE_FILE_DIR + "/confirm"
+
+
+@enum.unique
+class RESPONSE_CACHE_NAMESPACE(enum.Enum):
+    """
+    接口响应缓存的命名空间，写数据的 service 按命名空间整体失效对应接口缓存
+    """
+
+    STORE = "store"  # 门店列表
+    INVENTORY = "inventory"  # 门店库存
+    OPTIMIZATION = "optimization"  # 门店优化状态
+    FORECAST = "forecast"  # 预测使用的配置文件时间
+
+
+# 响应缓存 key：命名空间 + 失效代数 + 接口 endpoint + 预测版本 + 接口参数摘要
+RESPONSE_CACHE_REDIS_KEY = (
+    "response_cache:{namespace}:{generation}:{endpoint}:{version}:{digest}"
+)
+# 命名空间失效代数，失效时自增，旧代数的缓存不再命中，等待过期自动清理
+RESPONSE_CACHE_GENERATION_REDIS_KEY = "response_cache_generation:{namespace}"
+RESPONSE_CACHE_EXPIRE_SECONDS = 10 * 60
@@ -1,11 +1,14 @@
 # coding: utf-8
 import os
 import shutil
+import zipfile
 from urllib.parse import quote
-from io import BytesIO
+from io import BytesIO, TextIOWrapper
 
+from flask import Response
 from flask import make_response
 from flask import send_file
+from flask import stream_with_context
 
 from applications.IR.api import config
 from applications.IR.api.errors import (
@@ -98,6 +101,39 @@ class APIDownloadService:
 
         # 下载文件名
         file_name = file_name or os.path.basename(_file)
+        return cls.set_download_file_name(response, file_name)
+
+    @classmethod
+    def download_csv_zip_stream(cls, csv_files, file_name):
+        """
+        流式下载多个 csv 文件的 zip 压缩包：
+        每个 dataframe 直接写入 zip 压缩流，写完一个文件即返回已压缩的数据，
+        不生成临时文件，也不在内存中缓存整个压缩包
+        :param csv_files: iterable [(csv 文件名, dataframe)]
+        """
+
+        def generate():
+            stream = _ZipOutputStream()
+            with zipfile.ZipFile(stream, "w", zipfile.ZIP_DEFLATED) as zf:
+                for csv_file_name, df in csv_files:
+                    with TextIOWrapper(
+                        # 写入前不知道文件大小，超过 2G 的文件需要 zip64
+                        zf.open(csv_file_name, "w", force_zip64=True),
+                        encoding="utf-8",
+                        newline="",
+                    ) as csv_file:
+                        df.to_csv(csv_file)
+                    yield stream.pop()
+            # zip 文件目录信息
+            yield stream.pop()
+
+        response = Response(
+            stream_with_context(generate()), mimetype="application/zip"
+        )
+        return cls.set_download_file_name(response, file_name)
+
+    @staticmethod
+    def set_download_file_name(response, file_name):
         # 解决下载文件中文无法下载，乱码问题
         response.headers["Content-Disposition"] = (
             "attachment;"
@@ -106,3 +142,23 @@ class APIDownloadService:
             )
         )
         return response
+
+
+class _ZipOutputStream:
+    """
+    只写、不可 seek 的 zip 输出流，zipfile 写入的压缩数据暂存于此，由下载生成器及时取出
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data, self._chunks = b"".join(self._chunks), []
+        return data
@@ -33,10 +33,13 @@ CONFIGURATION_REDIS_KEY = "CONFIGURATION_SETTINGS"
 # 当前配置版本信息。预测结果和优化结果都追踪以该 version 值.
 CONFIGURATION_VERSION_KEY = "version"
 CONFIGURATION_STATUS_KEY = "status"
+# 最近一次保存配置中写入数据库失败的文件
+CONFIGURATION_FAILED_FILES_KEY = "failed_files"
 
 CONFIGURATION_DEFAULT_SETTINGS = {
     CONFIGURATION_VERSION_KEY: None,
     CONFIGURATION_STATUS_KEY: CONFIGURATION_STATUS.NULL.value,
+    CONFIGURATION_FAILED_FILES_KEY: [],
     "predict_cycle": [],
     "target": [],
     "min_order_amount": None,
@@ -81,6 +84,14 @@ CONFIGURATION_FILES_MODEL_MAP = {
     ),
 }
 
+# 增量数据文件分块写入数据库配置：chunk_size 每次读取 csv 行数，commit_size 每写入多少行提交一次事务
+CONFIGURATION_INGESTION_CONFIG = {
+    "chunk_size": 50000,
+    "commit_size": 200000,
+}
+# 配置缓存中每个文件写入数据库的进度 field，value 为 {"saved_rows": 0, "total_rows": 0}
+CONFIGURATION_FILE_PROGRESS_KEY = "progress_{file_name}"
+
 
 @enum.unique
 class CONFIGURATION_PREDICT_CYCLE(enum.Enum):
@@ -1,9 +1,12 @@
 # coding: utf-8
 import copy
+import logging
 import os
 import shutil
+from datetime import datetime
 
 from applications.IR.api import config as api_config
+from applications.IR.api.cache import ResponseCacheService
 from applications.IR.configuration.config import (
     CONFIGURATION_DEFAULT_SETTINGS,
     CONFIGURATION_FILES_MODEL_MAP,
@@ -11,11 +14,18 @@ from applications.IR.configuration.config import (
     CONFIGURATION_STATUS,
     CONFIGURATION_STATUS_KEY,
     CONFIGURATION_FILE_OPTIONS,
+    CONFIGURATION_INGESTION_CONFIG,
+    CONFIGURATION_FILE_PROGRESS_KEY,
+    CONFIGURATION_FAILED_FILES_KEY,
 )
-from common import CSV_FILE_SUFFIX, EXCEL_FILE_SUFFIX, redis_client
+from applications.IR.invoicing import StoreInventory
+from applications.IR.invoicing.service import StoreInventoryService
+from common import CSV_FILE_SUFFIX, EXCEL_FILE_SUFFIX, db, redis_client
 from common.datetime_utils import get_current_datetime
 from common.file_operations import FileOperation
 
+logger = logging.getLogger(__name__)
+
 
 class ConfigurationService:
     @classmethod
@@ -59,70 +69,177 @@ class ConfigurationService:
         configuration_settings["status"] = CONFIGURATION_STATUS.SAVEDB_ING.value
         cls.update_configuration_settings_to_redis(configuration_settings)
 
+    @classmethod
+    def list_upload_files(cls):
+        # 临时保存的上传数据文件（已经过校验、转换）csv 格式
+        return [
+            file_name
+            for file_name in os.listdir(api_config.TMP_SAVE_PATH)
+            if file_name.endswith(CSV_FILE_SUFFIX)
+        ]
+
     @classmethod
     def save_file_data_to_db(cls, user):
-        updated_files, updated_at = dict(), get_current_datetime()
-        configuration_settings = {
-            "status": CONFIGURATION_STATUS.PREDICT_ING.value
-        }
+        # 顺序写入所有上传文件，celery 任务中每个文件为并行的子任务，见 configuration_tasks
+        updated_at = get_current_datetime()
+        file_results = [
+            cls.save_file_to_db(file_name, user, updated_at)
+            for file_name in cls.list_upload_files()
+        ]
+        return cls.merge_file_results(file_results)
 
-        for file_name in os.listdir(api_config.TMP_SAVE_PATH):
-            # 遍历临时保存的上传数据文件（已经过校验、转换）csv 格式
-            if not file_name.endswith(CSV_FILE_SUFFIX):
-                continue
-
-            file_update_informations = {"updated_at": updated_at}
-            file_path = os.path.join(api_config.TMP_SAVE_PATH, file_name)
-            df = FileOperation().read_file_to_df(file_path)
-            # 获取对应 model 和更新方式
-            db_model, option = CONFIGURATION_FILES_MODEL_MAP.get(
-                file_name.rstrip(CSV_FILE_SUFFIX)
-            )
-            try:
-                if option is CONFIGURATION_FILE_OPTIONS.FULL_UPDATE:
-                    db_model.create_or_update(df)
-                elif option is CONFIGURATION_FILE_OPTIONS.INCREMENTAL_UPDATE:
-                    db_model.create(df)
-                    # 动态数据更新增加执行人信息
-                    file_update_informations.update({"operator": user})
-                """
-                如果保存临时文件写入数据库成功，则应该:
-                    - move 临时保存的配置文件 excel 到 api_config.CONFIRM_SAVE_PATH 以作为确定更新版
-                    - 更新缓存中 CONFIGURATION_SETTINGS 对应文件的更新时间。这里使用全局（函数内）
-                updated_at 是为了忽略写入数据库的时间差，让用户不会造成确定更新配置文件成功，
-                而时间不同的误解。
-                """
-                updated_files.update(
-                    {
-                        file_name.rstrip(
-                            CSV_FILE_SUFFIX
-                        ): file_update_informations
-                    }
+    @classmethod
+    def save_file_to_db(cls, file_name, user, updated_at):
+        """
+        写入单个上传文件到对应数据表，写入失败只影响当前文件
+        return: dict {"file_name": "store_inventory", "success": True, "informations": {"updated_at": ""}}
+        """
+        file_update_informations = {"updated_at": updated_at}
+        file_path = os.path.join(api_config.TMP_SAVE_PATH, file_name)
+        # 获取对应 model 和更新方式
+        db_model, option = CONFIGURATION_FILES_MODEL_MAP.get(
+            file_name.rstrip(CSV_FILE_SUFFIX)
+        )
+        try:
+            if option is CONFIGURATION_FILE_OPTIONS.FULL_UPDATE:
+                # 全量更新的主数据文件数据量小，整体读取后按主键新增或更新
+                df = FileOperation().read_file_to_df(file_path)
+                db_model.create_or_update(df)
+            elif option is CONFIGURATION_FILE_OPTIONS.INCREMENTAL_UPDATE:
+                location_ids = cls.save_file_chunks_to_db(
+                    db_model, file_name.rstrip(CSV_FILE_SUFFIX), file_path
                 )
+                # 门店库存写入后，更新对应门店的最新库存快照
+                if db_model is StoreInventory:
+                    StoreInventoryService.refresh_snapshot(location_ids)
+                # 动态数据更新增加执行人信息
+                file_update_informations.update({"operator": user})
+            """
+            如果保存临时文件写入数据库成功，则应该:
+                - move 临时保存的配置文件 excel 到 api_config.CONFIRM_SAVE_PATH 以作为确定更新版
+                - 更新缓存中 CONFIGURATION_SETTINGS 对应文件的更新时间。这里所有文件使用同一个
+            updated_at 是为了忽略写入数据库的时间差，让用户不会造成确定更新配置文件成功，
+            而时间不同的误解。
+            """
+            tmp_excel_file_path = file_path.replace(
+                CSV_FILE_SUFFIX, EXCEL_FILE_SUFFIX
+            )
+            confirm_path = tmp_excel_file_path.replace(
+                api_config.TMP_SAVE_PATH, api_config.CONFIRM_SAVE_PATH
+            )
+            shutil.move(tmp_excel_file_path, confirm_path)
+            success = True
+        except Exception:
+            # 回滚失败的事务，同一 worker 的 scoped session 可以继续执行之后的任务
+            db.session.rollback()
+            logger.exception("save %s to db failed", file_name)
+            success = False
 
-                tmp_excel_file_path = file_path.replace(
-                    CSV_FILE_SUFFIX, EXCEL_FILE_SUFFIX
-                )
-                confirm_path = tmp_excel_file_path.replace(
-                    api_config.TMP_SAVE_PATH, api_config.CONFIRM_SAVE_PATH
-                )
-                shutil.move(tmp_excel_file_path, confirm_path)
-            except Exception as e:
-                configuration_settings[
-                    "status"
-                ] = CONFIGURATION_STATUS.SAVEDB_FAILURE.value
-                continue
-                # TODO raise error to log
-
-        if updated_files:
-            configuration_settings.update(updated_files)
+        return {
+            "file_name": file_name.rstrip(CSV_FILE_SUFFIX),
+            "success": success,
+            "informations": file_update_informations,
+        }
+
+    @classmethod
+    def merge_file_results(cls, file_results):
+        """
+        合并每个文件的写入结果，更新到配置缓存：
+            - 写入成功的文件更新对应文件的更新时间、执行人信息
+            - 写入失败的文件记录在 failed_files 中，配置状态为写入 database 失败
+        """
+        failed_files = [
+            result["file_name"]
+            for result in file_results
+            if not result["success"]
+        ]
+        configuration_settings = {
+            "status": (
+                CONFIGURATION_STATUS.SAVEDB_FAILURE.value
+                if failed_files
+                else CONFIGURATION_STATUS.PREDICT_ING.value
+            ),
+            CONFIGURATION_FAILED_FILES_KEY: failed_files,
+        }
+        configuration_settings.update(
+            {
+                result["file_name"]: result["informations"]
+                for result in file_results
+                if result["success"]
+            }
+        )
         cls.update_configuration_settings_to_redis(configuration_settings)
+        # 主数据、库存数据更新后，失效门店、库存、优化状态接口缓存
+        ResponseCacheService.invalidate(
+            api_config.RESPONSE_CACHE_NAMESPACE.STORE,
+            api_config.RESPONSE_CACHE_NAMESPACE.INVENTORY,
+            api_config.RESPONSE_CACHE_NAMESPACE.OPTIMIZATION,
+        )
 
         return (
             configuration_settings["status"]
             == CONFIGURATION_STATUS.PREDICT_ING.value
         )
 
+    @classmethod
+    def save_file_chunks_to_db(cls, db_model, file_name, file_path):
+        """
+        增量数据文件分块读取，以 Core 层 executemany 批量写入数据库，
+        每写入 commit_size 行提交一次事务，并更新配置缓存中该文件的写入进度。
+        本次写入的行使用相同的 created_at，写入失败时删除已提交的分块并重置进度，
+        重新上传文件不会重复写入
+        return: list 写入数据中的 location_id（库存文件），用于更新库存快照
+        """
+        chunk_size = CONFIGURATION_INGESTION_CONFIG["chunk_size"]
+        commit_size = CONFIGURATION_INGESTION_CONFIG["commit_size"]
+        progress = {
+            "saved_rows": 0,
+            "total_rows": FileOperation.count_csv_rows(file_path),
+        }
+        progress_key = CONFIGURATION_FILE_PROGRESS_KEY.format(
+            file_name=file_name
+        )
+        # MySQL DATETIME 只精确到秒
+        ingested_at = datetime.now().replace(microsecond=0)
+
+        location_ids, uncommitted_rows = set(), 0
+        try:
+            for chunk_df in FileOperation.read_csv_chunks(
+                file_path, chunk_size
+            ):
+                db_model.bulk_insert(
+                    chunk_df.assign(
+                        created_at=ingested_at, updated_at=ingested_at
+                    ),
+                    commit=False,
+                )
+                if "location_id" in chunk_df.columns:
+                    location_ids.update(
+                        chunk_df["location_id"].unique().tolist()
+                    )
+
+                progress["saved_rows"] += len(chunk_df)
+                uncommitted_rows += len(chunk_df)
+                if uncommitted_rows >= commit_size:
+                    db.session.commit()
+                    uncommitted_rows = 0
+                    cls.update_configuration_settings_to_redis(
+                        {progress_key: dict(progress)}
+                    )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            db_model.delete([(db_model.created_at, ingested_at)], commit=True)
+            cls.update_configuration_settings_to_redis(
+                {progress_key: dict(progress, saved_rows=0)}
+            )
+            raise
+
+        cls.update_configuration_settings_to_redis(
+            {progress_key: dict(progress)}
+        )
+        return list(location_ids)
+
     @classmethod
     def update_configuration_settings_to_redis(cls, configuration_settings):
         redis_client.hmset(CONFIGURATION_REDIS_KEY, configuration_settings)
@@ -14,3 +14,8 @@ class FORECAST_STATUS(enum.Enum):
 
 RUNNING_FORECAST_VERSION_REDIS_KEY = "running_forecast_version"
 FORECAST_FILE_TIME_REDIS_KEY = "forecast_at"
+
+# 按预测版本缓存的各门店预测结果：hash key 为版本，field 为 store_id，value 为 json 列存数组
+FORECAST_CACHE_REDIS_KEY = "forecast_cache_{version}"
+# 预测版本只在重新预测成功时更新，缓存过期时间作为旧版本未清理时的兜底
+FORECAST_CACHE_EXPIRE_SECONDS = 7 * 24 * 3600
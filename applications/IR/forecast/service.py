@@ -1,5 +1,8 @@
 # coding: utf-8
 import os
+import json
+import numpy as np
+import pandas as pd
 from common import CSV_FILE_SUFFIX
 from applications.IR.forecast import Forecast
 from applications.IR.sku import SKU
@@ -8,10 +11,14 @@ from applications.IR.forecast import errors
 from applications.IR.forecast.config import (
     FORECAST_FILE_TIME_REDIS_KEY,
     FORECAST_STATUS,
+    FORECAST_CACHE_REDIS_KEY,
+    FORECAST_CACHE_EXPIRE_SECONDS,
 )
 from applications.IR.invoicing.service import StoreInventoryService
 from applications.IR.api import config as api_config
+from applications.IR.api.cache import ResponseCacheService
 from common import redis_client
+from celery_tasks.forecast_tasks import cache_forecast_results
 
 
 class ForecastService:
@@ -40,16 +47,38 @@ class ForecastService:
     ):
         """
         params:
-            store_id                获取对应 store 的预测结果
+            store_id                获取对应 store 的预测结果，list 为多门店批量查询
             sku_id                  只查询部分 sku 信息，None 为全部 sku 信息
             with_sku_info           是否需要 Join 商品信息
             with_inventory_info     是否需要 Join 当前（门店）库存信息
         """
+        # 不需要 join 商品信息时，优先读取当前版本的预测结果缓存
+        result_df = None
+        if not with_sku_info:
+            result_df = ForecastCacheService.get(self.version, store_id, sku_id)
+        if result_df is None:
+            result_df = self.query_forecast_results(
+                store_id, sku_id, with_sku_info
+            )
+
+        # 封装对应门店的当前（最后日期）的库存信息
+        if with_inventory_info:
+            store_inventory_df = StoreInventoryService(
+                store_id=store_id, sku_id=result_df.sku_id.tolist()
+            ).get_last_store_inventory()
+            result_df = result_df.merge(store_inventory_df, on=["sku_id"])
+
+        return result_df
+
+    def query_forecast_results(self, store_id, sku_id, with_sku_info):
         # 默认查询某个门店在某次预测结果中，sku 对应的预测结果
         args = [self._model.qty_mean, self._model.qty_std, self._model.sku_id]
+        # 如果有多门店，则查询结果加上门店数据维度
+        if isinstance(store_id, list):
+            args.append(self._model.store_id)
         filter_spec = [
             self._model.version == self.version,
-            self._model.store_id == store_id,
+            (self._model.store_id, store_id),
         ]
         if sku_id is not None:
             filter_spec.append((self._model.sku_id, sku_id))
@@ -59,7 +88,7 @@ class ForecastService:
             args.extend([SKU.sku_name, SKU.category, SKU.price])
             join_ons.extend([(SKU, SKU.sku_id == self._model.sku_id)])
 
-        result_df = self._model.model_query(
+        return self._model.model_query(
             args=args,
             filter_spec=filter_spec,
             join_ons=join_ons,
@@ -67,18 +96,10 @@ class ForecastService:
             df=True,
         )
 
-        # 封装对应门店的当前（最后日期）的库存信息
-        if with_inventory_info:
-            store_inventory_df = StoreInventoryService(
-                store_id=store_id, sku_id=result_df.sku_id.tolist()
-            ).get_last_store_inventory()
-            result_df = result_df.merge(store_inventory_df, on=["sku_id"])
-
-        return result_df
-
     @classmethod
     def update_forecast_status(cls, version, status):
         if status == FORECAST_STATUS.SUCCESS.value:
+            previous_version = cls.get_last_forecast_version()
             # 如果预测成功，更新 configuration 保存的当前版本信息, 并修改配置状态为完成
             update_configurations = {
                 configuration_config.CONFIGURATION_VERSION_KEY: version,
@@ -93,6 +114,12 @@ class ForecastService:
         redis_client.hmset(
             configuration_config.CONFIGURATION_REDIS_KEY, update_configurations
         )
+        ResponseCacheService.invalidate(
+            api_config.RESPONSE_CACHE_NAMESPACE.FORECAST
+        )
+        if status == FORECAST_STATUS.SUCCESS.value:
+            # 异步预先缓存新版本预测结果，并清除旧版本缓存
+            cache_forecast_results.delay(version, previous_version)
 
     @classmethod
     def cancel_forecast(cls):
@@ -109,6 +136,92 @@ class ForecastService:
         )
 
 
+class ForecastCacheService:
+    """
+    按预测版本缓存各门店的预测结果（预测均值、标准差、每天预测均值），
+    同一版本的预测结果不会改变，缓存 key 包含版本号，新版本预测成功后旧版本缓存即不再使用
+    """
+
+    _model = Forecast
+    columns = ["qty_mean", "qty_std", "sku_id", "daily_mean"]
+    # 标记该版本缓存已构建完成，缓存中没有的门店即为没有预测结果
+    built_field = "_built"
+
+    @staticmethod
+    def key(version):
+        return FORECAST_CACHE_REDIS_KEY.format(version=version)
+
+    @classmethod
+    def build(cls, version):
+        forecast_df = cls._model.model_query(
+            args=[
+                cls._model.store_id,
+                cls._model.qty_mean,
+                cls._model.qty_std,
+                cls._model.sku_id,
+            ],
+            filter_spec=[cls._model.version == version],
+            df=True,
+        )
+        mapping = {
+            int(store_id): cls.to_columns(store_forecast_df)
+            for store_id, store_forecast_df in forecast_df.groupby("store_id")
+        }
+        mapping[cls.built_field] = 1
+
+        key = cls.key(version)
+        redis_client.delete(key)
+        redis_client.hmset(key, mapping)
+        redis_client.expire(key, FORECAST_CACHE_EXPIRE_SECONDS)
+
+    @classmethod
+    def invalidate(cls, version):
+        redis_client.delete(cls.key(version))
+
+    @staticmethod
+    def to_columns(forecast_df):
+        qty_mean = forecast_df["qty_mean"].values
+        return {
+            "qty_mean": qty_mean.tolist(),
+            "qty_std": forecast_df["qty_std"].tolist(),
+            "sku_id": forecast_df["sku_id"].tolist(),
+            # TODO 第一版 以预测均值 / 7 得出每天预测的平均数量，预测值为负，当做 0 处理
+            "daily_mean": np.where(qty_mean > 0, qty_mean / 7, 0).tolist(),
+        }
+
+    @classmethod
+    def get(cls, version, store_id, sku_id=None):
+        """
+        params 同 ForecastService.get_forecast_results
+        return: DataFrame, 当前版本缓存还未构建时返回 None
+        """
+        store_ids = store_id if isinstance(store_id, list) else [store_id]
+        values = redis_client.hmget(
+            cls.key(version), [cls.built_field] + store_ids
+        )
+        if values[0] is None:
+            return None
+
+        store_forecast_dfs = []
+        for _store_id, value in zip(store_ids, values[1:]):
+            store_forecast_df = pd.DataFrame(
+                json.loads(value) if value else {}, columns=cls.columns
+            )
+            if isinstance(store_id, list):
+                store_forecast_df["store_id"] = _store_id
+            store_forecast_dfs.append(store_forecast_df)
+        result_df = (
+            pd.concat(store_forecast_dfs, ignore_index=True)
+            if store_forecast_dfs
+            else pd.DataFrame(columns=cls.columns)
+        )
+
+        if sku_id is not None:
+            sku_ids = sku_id if isinstance(sku_id, list) else [sku_id]
+            result_df = result_df[result_df.sku_id.isin(sku_ids)]
+        return result_df.reset_index(drop=True)
+
+
 class ForecastFileTimeService:
     @classmethod
     def get(cls):
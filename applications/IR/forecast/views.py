@@ -4,6 +4,8 @@
 """
 from flask_restful import Resource
 from flask_restful import reqparse
+from applications.IR.api.cache import cached_response
+from applications.IR.api.config import RESPONSE_CACHE_NAMESPACE
 from applications.IR.forecast.service import (
     ForecastService,
     ForecastFileTimeService,
@@ -57,5 +59,6 @@ class ForecastFileTimeViewAPI(Resource):
         self.service = ForecastFileTimeService
         super(ForecastFileTimeViewAPI, self).__init__()
 
+    @cached_response(RESPONSE_CACHE_NAMESPACE.FORECAST)
     def get(self):
         return self.service.get()
@@ -9,6 +9,7 @@ from applications.IR.invoicing.models import (
     SellIn,
     SellOut,
     StoreInventory,
+    StoreInventorySnapshot,
 )
 from applications.IR.invoicing.route import (
     inventory_api,
@@ -73,6 +73,24 @@ class StoreInventory(db.Model, InventoryModelBase):
     location_id = db.Column(db.Integer, nullable=False)
 
 
+class StoreInventorySnapshot(db.Model, ModelBase):
+    """
+    门店最新库存快照表：每个门店的 sku 只保留该门店最后库存日期的库存汇总，
+    门店库存数据写入 store_inventory 后由 StoreInventoryService.refresh_snapshot 更新
+    """
+
+    __tablename__ = "store_inventory_snapshot"
+    __table_args__ = (
+        db.Index("ix_location_id_sku_id", "location_id", "sku_id", unique=True),
+    )
+
+    # location_id is Foreign store.store_id
+    location_id = db.Column(db.Integer, nullable=False)
+    sku_id = db.Column(db.String(16), nullable=False)
+    qty = db.Column(db.Float, nullable=False)
+    date = db.Column(db.DateTime)
+
+
 class HubInventory(db.Model, InventoryModelBase):
 
     __tablename__ = "hub_inventory"
@@ -5,13 +5,17 @@ import pandas as pd
 import numpy as np
 from sqlalchemy import func
 from common import db
+from applications.IR.api.cache import ResponseCacheService
+from applications.IR.api.config import RESPONSE_CACHE_NAMESPACE
 from applications.IR.invoicing.models import (
     HubInventory,
     StoreInventory,
+    StoreInventorySnapshot,
 )
 from applications.IR.store.service import HubService
 from applications.IR.sku import SKU
 from replenish import config as replenish_config
+from replenish.utils import classify_freshness
 from common.datetime_utils import (
     get_today_date,
     get_past_3weeks_Monday_and_Sunday,
@@ -21,20 +25,24 @@ from common.datetime_utils import (
 
 class StoreInventoryService:
     _model = StoreInventory
+    _snapshot_model = StoreInventorySnapshot
 
     def __init__(self, store_id=None, sku_id=None):
         self.store_id = store_id
         self.sku_id = sku_id
         # 根据 store id，sku id 封装基础查询过滤条件
-        self.filter_spec = self._gen_base_filter_spec(store_id, sku_id)
+        self.filter_spec = self._gen_base_filter_spec(
+            self._model, store_id, sku_id
+        )
 
-    def _gen_base_filter_spec(self, store_id, sku_id):
-        return self._model.format_filter_spec(
+    @staticmethod
+    def _gen_base_filter_spec(model, store_id, sku_id):
+        return model.format_filter_spec(
             [
                 _spec
                 for _spec in [
-                    (self._model.location_id, store_id),
-                    (self._model.sku_id, sku_id),
+                    (model.location_id, store_id),
+                    (model.sku_id, sku_id),
                 ]
                 if _spec[1]
             ]
@@ -42,34 +50,21 @@ class StoreInventoryService:
 
     def get_last_store_inventory(self, with_sku_info=False, **kwargs):
         """
-        查询出最大的库存日期 StoreInventory.date，作为过滤条件查询最新的库存结果
+        从门店最新库存快照表中查询门店 sku 的最新库存结果，
+        快照表以 (location_id, sku_id) 唯一索引，单门店查询为一次索引查找
 
         params kwargs 可接受参数:
-        - inventory_arg: list [StoreInventory.sku_id, StoreInventory.qty] 额外的门店库存信息字段
+        - inventory_arg: list [StoreInventorySnapshot.date] 额外的门店库存信息字段
         - sku_info: list  [SKU.sku_name, SKU.category, SKU.price, SKU.sku_id] 额外的 sku 信息字段
-
-
-        (以后可能会用到的扩展实现)
-        获取 store 保存数据的最新 sku 库存数据。
-        先查询出每个 sku，store（location_id）的最大主键 id 值，
-        然后再用 id 反查对应的 qty 值。再 server 层解决 sql 嵌套查询
-
-        sku_inventory_max_ids = self._model.model_query(
-            args=[self._model.sku_id, self._model.location_id],
-            aggregated_args=[func.max(self._model.id)],
-            filter_spec=self.filter_spec)
-        sku_inventory_max_ids = (_id for *_, _id in sku_inventory_max_ids)
-
-        store_inventory_df = self._model.model_query(
-            args=args,
-            filter_spec=[self._model.id.in_(sku_inventory_max_ids)],
-            df=True)
         """
-
-        args = [self._model.sku_id] + kwargs.get("inventory_arg", [])
+        snapshot = self._snapshot_model
+        filter_spec = self._gen_base_filter_spec(
+            snapshot, self.store_id, self.sku_id
+        )
+        args = [snapshot.sku_id] + kwargs.get("inventory_arg", [])
         # 如果有多门店，则查询结果加上门店数据维度
         if isinstance(self.store_id, list):
-            args.append(self._model.location_id)
+            args.append(snapshot.location_id)
 
         # 	    store_inventory sku_id
         # 	0  7.000000         10178359
@@ -78,52 +73,119 @@ class StoreInventoryService:
         # 	3  1.000000         10197731
         # 	4  0.100000         10178954
 
-        sub_query = db.session.query(
-            func.max(self._model.date).label("last_inventory_date")
-        ).subquery()
-        store_inventory_query = (
+        if not with_sku_info:
+            return snapshot.model_query(
+                args=[snapshot.qty.label("store_inventory")] + args,
+                filter_spec=filter_spec,
+                df=True,
+            )
+
+        """
+        封装查询的 sku 信息，全量 sku 信息 LEFT JOIN 门店库存快照，如果没有最新库存，补 0:
+                store_inventory    sku_id       sku_name   category   unit_price
+            0     0.0            10027339     士力架花生35克散1x250  Chocolate  614.20
+            1     7.0            10034301     德芙牛奶7.5g散1x1000  Chocolate  424.00
+        """
+        # 默认查询 sku 信息这些，如果有补充在 kwargs 中 sku info 增加
+        sku_info = [
+            SKU.sku_name,
+            SKU.category,
+            SKU.price.label("unit_price"),
+        ] + kwargs.get("sku_info", [])
+        args = [
+            func.coalesce(snapshot.qty, 0.0).label("store_inventory"),
+            SKU.sku_id,
+        ] + args[1:]
+        store_inventory_query = db.session.query(*(args + sku_info)).outerjoin(
+            snapshot, db.and_(snapshot.sku_id == SKU.sku_id, *filter_spec)
+        )
+        return snapshot.convert_query_to_df(store_inventory_query)
+
+    @classmethod
+    def refresh_snapshot(cls, location_ids=None):
+        """
+        门店库存数据写入后，更新这些门店（None 为全部门店）的最新库存快照：
+        删除门店原有快照，再以每个门店最后库存日期的 sku 库存汇总 insert from select 写入，
+        全部在数据库端完成，同一事务提交
+        """
+        model, snapshot = cls._model, cls._snapshot_model
+        location_filter = (
+            [(model.location_id, location_ids)] if location_ids else []
+        )
+        last_dates = (
+            db.session.query(
+                model.location_id,
+                func.max(model.date).label("last_inventory_date"),
+            )
+            .filter(*model.format_filter_spec(location_filter))
+            .group_by(model.location_id)
+            .subquery()
+        )
+        last_inventory_query = (
             db.session.query(
-                func.sum(self._model.qty).label("store_inventory"), *args
+                model.location_id,
+                model.sku_id,
+                func.sum(model.qty),
+                model.date,
+                func.now(),
+                func.now(),
             )
             .join(
-                sub_query, sub_query.c.last_inventory_date == self._model.date
+                last_dates,
+                db.and_(
+                    last_dates.c.location_id == model.location_id,
+                    last_dates.c.last_inventory_date == model.date,
+                ),
             )
-            .filter(*self.filter_spec)
-            .group_by(*args)
+            .group_by(model.location_id, model.sku_id, model.date)
         )
-        store_inventory_df = self._model.convert_query_to_df(
-            store_inventory_query
-        )
-
-        # 封装查询的 sku 信息
-        if with_sku_info:
-            """
-            base_sku_info_df:
-                        sku_name   category   unit_price    sku_id
-            0     士力架花生35克散1x250  Chocolate  614.20  10027339
-            1    德芙牛奶7.5g散1x1000  Chocolate  424.00  10034301
-            2   德芙脆香米12g散新 1X600  Chocolate    0.00  10043726
-            3  德芙摩卡榛14.5g散新1X600  Chocolate  204.80  10043728
-            4  德芙果仁葡萄14.5g新1X600  Chocolate  842.28  10043730
-            """
-            # 默认查询 sku 信息这些，如果有补充在 kwargs 中 sku info 增加
-            sku_info = [
-                SKU.sku_name,
-                SKU.category,
-                SKU.price.label("unit_price"),
-                SKU.sku_id,
-            ] + kwargs.get("sku_info", [])
 
-            sku_info_df = SKU.model_query(args=sku_info, df=True)
-            # 全量 sku 信息，返回门店库存值，如果没有最新库存，补 0
-            store_inventory_df = pd.merge(
-                store_inventory_df, sku_info_df, how="right", on="sku_id"
+        try:
+            snapshot_filter = (
+                [(snapshot.location_id, location_ids)] if location_ids else []
             )
-            store_inventory_df["store_inventory"] = store_inventory_df[
-                "store_inventory"
-            ].fillna(0.0)
+            snapshot.delete(snapshot_filter, commit=False)
+            db.session.execute(
+                snapshot.__table__.insert().from_select(
+                    [
+                        "location_id",
+                        "sku_id",
+                        "qty",
+                        "date",
+                        "created_at",
+                        "updated_at",
+                    ],
+                    last_inventory_query.statement,
+                )
+            )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        ResponseCacheService.invalidate(RESPONSE_CACHE_NAMESPACE.INVENTORY)
 
-        return store_inventory_df
+    def get_inventory_cohorts(self):
+        """
+        门店最后库存日期当天按生产日期分批的 sku 库存，用于坏货批次模拟，
+        与最新库存快照 join 取最后库存日期，一次查询
+        :return: DataFrame sku_id, qty, date, production_dte
+        """
+        model, snapshot = self._model, self._snapshot_model
+        cohorts_query = (
+            db.session.query(
+                model.sku_id, model.qty, model.date, model.production_dte
+            )
+            .join(
+                snapshot,
+                db.and_(
+                    snapshot.location_id == model.location_id,
+                    snapshot.sku_id == model.sku_id,
+                    snapshot.date == model.date,
+                ),
+            )
+            .filter(*self.filter_spec)
+        )
+        return model.convert_query_to_df(cohorts_query)
 
     def get_past_4_weeks_inventory_status(self, sku_shelf_life):
         """
@@ -132,17 +194,13 @@ class StoreInventoryService:
         """
         _today = get_today_date()
         past_3weeks_date_range = get_past_3weeks_Monday_and_Sunday(_today)
-        inventory_dates, inventory_weeks = zip(
-            *[
-                (
-                    self._model.last_inventory_date(
-                        (Monday_of_week, Sunday_of_week)
-                    ),
-                    format_week(Monday_of_week),
-                )
-                for Monday_of_week, Sunday_of_week in past_3weeks_date_range
-            ]
+        inventory_dates = self.get_weeks_last_inventory_date(
+            past_3weeks_date_range
         )
+        inventory_weeks = [
+            format_week(Monday_of_week)
+            for Monday_of_week, _ in past_3weeks_date_range
+        ]
 
         # 封装当周没有库存更新的 no_inventory_week_df
         no_inventory_weeks = [
@@ -179,27 +237,30 @@ class StoreInventoryService:
             self._model.date,
             self._model.production_dte,
         ]
-        """
-        CAST (expression AS data_type)
-        参数说明：
-        expression：任何有效的 SQLServer 表达式。
-        AS：用于分隔两个参数，在 AS 之前的是要处理的数据，在AS之后是要转换的数据类型。
-        data_type：目标系统所提供的数据类型，包括bigint和sql_variant，不能使用用户定义的数据类型。
-        """
+        # 按每周最后库存日期当天的时间范围过滤，可以使用 (location_id, date) 索引
         filter_spec = self.filter_spec + [
-            db.cast(self._model.date, db.DATE).in_(
-                (db.cast(_date, db.DATE) for _date in inventory_dates if _date)
+            db.or_(
+                *[
+                    db.and_(
+                        self._model.date >= day_start,
+                        self._model.date < next_day_start,
+                    )
+                    for day_start, next_day_start in (
+                        self.get_day_datetime_range(_date)
+                        for _date in inventory_dates
+                        if _date
+                    )
+                ]
             )
         ]
         inventory_df = self._model.model_query(
             args=args, filter_spec=filter_spec, df=True
         )
         inventory_df = inventory_df.merge(sku_shelf_life, on="sku_id")
-        inventory_df["quality"] = inventory_df.apply(
-            lambda row: self.map_inventory_freshness(
-                row.date, row.production_dte, row.shelf_life
-            ),
-            axis=1,
+        inventory_df["quality"] = self.map_inventory_freshness_array(
+            inventory_df["date"],
+            inventory_df["production_dte"],
+            inventory_df["shelf_life"],
         )
 
         sum_cols, group_cols = ["qty", "amount"], ["date", "quality"]
@@ -218,6 +279,64 @@ class StoreInventoryService:
             [inventory_status_df, no_inventory_week_df], sort=False
         )
 
+    def get_weeks_last_inventory_date(self, weeks_date_range):
+        """
+        一次分组查询门店在所有周范围内每天的最后库存日期，在内存中取每周的最大值
+        :param weeks_date_range: list [(Monday_of_week, Sunday_of_week)]
+        :return: list 与 weeks_date_range 对应的每周最后库存日期，当周没有库存为 None
+        """
+        range_start = min(Monday for Monday, _ in weeks_date_range)
+        range_end = max(Sunday for _, Sunday in weeks_date_range)
+        daily_last_dates = self._model.model_query(
+            args=[func.date(self._model.date)],
+            aggregated_args=[func.max(self._model.date)],
+            filter_spec=self.filter_spec
+            + [self._model.date.between(range_start, range_end)],
+        )
+        daily_last_dates = [_date for _, _date in daily_last_dates]
+
+        weeks_last_date = []
+        for Monday_of_week, Sunday_of_week in weeks_date_range:
+            week_dates = [
+                _date
+                for _date in daily_last_dates
+                if self.to_datetime(Monday_of_week)
+                <= _date
+                <= self.to_datetime(Sunday_of_week)
+            ]
+            weeks_last_date.append(max(week_dates) if week_dates else None)
+        return weeks_last_date
+
+    @staticmethod
+    def to_datetime(_date):
+        # 日期与数据库 DateTime 字段比较时为当天 0 点
+        return datetime.datetime.combine(_date, datetime.time())
+
+    @classmethod
+    def get_day_datetime_range(cls, _datetime):
+        # 日期当天的时间范围 [当天 0 点, 第二天 0 点)
+        day_start = cls.to_datetime(_datetime.date())
+        return day_start, day_start + datetime.timedelta(days=1)
+
+    @staticmethod
+    def map_inventory_freshness_array(
+        inventory_dates, sku_production_dtes, sku_shelf_lives
+    ):
+        """
+        map_inventory_freshness 的向量化实现，对所有库存行一次计算新鲜度等级
+        """
+        inventory_days = (
+            pd.to_datetime(inventory_dates)
+            - pd.to_datetime(sku_production_dtes)
+        ).dt.days
+        history_inventory_config = replenish_config.HISTORY_INVENTORY_CONFIG
+        return classify_freshness(
+            inventory_days.values,
+            sku_shelf_lives.values,
+            history_inventory_config["freshness_thresholds"],
+            list(history_inventory_config["sku_quality_mapping"].values()),
+        )
+
     @staticmethod
     def map_inventory_freshness(
         inventory_date: datetime.date,
@@ -4,6 +4,8 @@
 """
 from flask_restful import Resource
 
+from applications.IR.api.cache import cached_response
+from applications.IR.api.config import RESPONSE_CACHE_NAMESPACE
 from applications.IR.invoicing.service import StoreInventoryService
 
 
@@ -17,6 +19,7 @@ class StoreInventoryViewAPI(Resource):
 
         super(StoreInventoryViewAPI, self).__init__()
 
+    @cached_response(RESPONSE_CACHE_NAMESPACE.INVENTORY)
     def get(self, store_id):
         # 获取某个门店下的库存结果
         store_inventory_service = self.service(store_id=store_id)
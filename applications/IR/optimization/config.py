@@ -23,6 +23,9 @@ OPTIMIZATION_SAFETY_DAYS_DEFAULT = 7  # 安全库存天数默认值为 7 天
 
 OPTIMIZE_COUNT_REDIS_KEY = "{store_id}_optimize_cnt"  # 门店当日优化（提交订单）次数
 
+# 批量下载订单时，每次从数据库游标读取的 sku 结果行数
+OPTIMIZATION_DOWNLOAD_YIELD_PER = 10000
+
 
 ORDER_FILE_COLUMNS_MAPPING = {
     "sku_id": "SKU ID",
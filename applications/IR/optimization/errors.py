@@ -0,0 +1,6 @@
+# coding: utf-8
+
+
+class OrderDoesNotExistError(Exception):
+    status_code = 404
+    message = "订单不存在"
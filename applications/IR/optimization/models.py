@@ -10,6 +10,10 @@ class Optimization(db.Model, ModelBase):
     """
 
     __tablename__ = "optimization"
+    # 订单列表按状态过滤、更新时间倒序分页查询
+    __table_args__ = (
+        db.Index("ix_status_updated_at", "status", "updated_at", "id"),
+    )
 
     store_id = db.Column(db.Integer, nullable=False)
     # 对应 forecast.version
@@ -6,6 +6,7 @@ from applications.IR.optimization.views import (
     OptimizationViewAPI,
     OptimizationListViewAPI,
     StoreOptimizationViewAPI,
+    StoresOptimizationViewAPI,
     StoreOptimizationStatusViewAPI,
     OptimizationResetViewAPI,
     OptimizationSubmitViewAPI,
@@ -45,6 +46,9 @@ optimization_api.add_resource(
     "/estimate/<int:store_id>",
     endpoint="optimizations/estimate",
 )
+optimization_api.add_resource(
+    StoresOptimizationViewAPI, "/stores", endpoint="optimizations/stores"
+)
 optimization_api.add_resource(
     StoreOptimizationStatusViewAPI,
     "/stores/status",
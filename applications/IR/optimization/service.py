@@ -2,11 +2,13 @@
 import math
 import datetime
 import json
+import numpy as np
 import pandas as pd
-from tempfile import NamedTemporaryFile, TemporaryDirectory
-import zipfile
 from io import BytesIO
+from itertools import chain, groupby
+from operator import itemgetter
 from sqlalchemy import func
+from werkzeug.utils import cached_property
 from applications.IR.optimization.models import (
     Optimization,
     OptimizedOrder,
@@ -14,6 +16,7 @@ from applications.IR.optimization.models import (
 )
 from flask_security.core import current_user
 from applications.IR.store import Store
+from applications.IR.store.service import HubService
 from applications.IR.sku import SKU
 from applications.IR.forecast.service import ForecastService
 from applications.IR.invoicing.service import (
@@ -27,12 +30,18 @@ from applications.IR.optimization.config import (
 )
 from common import db, redis_client
 from common.datetime_utils import get_today_date, get_current_datetime
+from replenish import config as replenish_config
 from replenish import service as replenish_service
+from replenish.runner import pack_store_inputs
 from applications.IR.optimization.config import (
     OPTIMIZE_COUNT_REDIS_KEY,
     ORDER_FILE_COLUMNS_MAPPING,
+    OPTIMIZATION_DOWNLOAD_YIELD_PER,
 )
 from applications.IR.api.service import APIDownloadService
+from applications.IR.api.cache import ResponseCacheService
+from applications.IR.api.config import RESPONSE_CACHE_NAMESPACE
+from applications.IR.optimization import errors
 
 
 class OptimizationService:
@@ -44,11 +53,12 @@ class OptimizationService:
         self, order_id=None, store_id=None, sku_id=None, safety_days=None
     ):
         self.safety_days = safety_days or OPTIMIZATION_SAFETY_DAYS_DEFAULT
+        self.sku_id = sku_id
 
         if order_id is not None:
             self._init_by_order_id(order_id)
         elif store_id is not None:
-            self._init_by_store_id(store_id, sku_id)
+            self._init_by_store_id(store_id)
 
     def _init_by_order_id(self, order_id):
         # 根据订单号获取已完成订单 _obj
@@ -56,13 +66,12 @@ class OptimizationService:
         self.version = self._obj.version
         self.store_id = self._obj.store_id
 
-    def _init_by_store_id(self, store_id, sku_id):
-        # 根据门店信息，初始化对应的预测版本信息，库存信息。work for 生成初始化订单，预测优化结果等场景
+    def _init_by_store_id(self, store_id):
+        """
+        根据门店信息，初始化对应的预测版本信息和优化结果。work for 生成初始化订单，预测优化结果等场景
+        门店库存、预测结果为 cached_property，在接口实际用到时才查询，同一个 service 实例（一次请求）只查询一次
+        """
         self.store_id = store_id
-        self.sku_id = sku_id
-
-        self.get_inventory_info()
-        self.get_forecast_info()
         self._obj = self.get_optimization_obj_by_store_id()
 
     def get_optimization_obj_by_store_id(self):
@@ -76,32 +85,30 @@ class OptimizationService:
             .first()
         )
 
-    def get_inventory_info(self):
-        # 获取门店库存信息
-        self.store_inventory_service = StoreInventoryService(
-            store_id=self.store_id, sku_id=self.sku_id
-        )
-        self.store_inventory_df = self.get_store_inventory()
+    @cached_property
+    def store_inventory_service(self):
+        return StoreInventoryService(store_id=self.store_id, sku_id=self.sku_id)
 
-    def get_forecast_info(self):
-        # 获取最新一版预测结果
-        forecast_service = ForecastService()
-        self.version = forecast_service.version
-        self.forecast_df = forecast_service.get_forecast_results(
-            self.store_id, self.sku_id
-        )
+    @cached_property
+    def store_inventory_df(self):
+        # 获取门店库存信息
+        return self.get_store_inventory()
 
-    @property
+    @cached_property
     def version(self):
-        return self._version
+        # 最新一版预测版本，通过订单号实例化时为订单对应的预测版本
+        return ForecastService().version
 
-    @version.setter
-    def version(self, version):
-        self._version = version
+    @cached_property
+    def forecast_df(self):
+        # 获取当前版本预测结果
+        return ForecastService(self.version).get_forecast_results(
+            self.store_id, self.sku_id
+        )
 
     @property
     def optimized_order_version(self):
-        return f"{self._version}_{self.store_id}"
+        return f"{self.version}_{self.store_id}"
 
     @staticmethod
     def simplify_status(status):
@@ -131,23 +138,30 @@ class OptimizationService:
         ]
         # # 订单列表只展示已完成状态的订单
         filter_spec = [(cls._model.status, OPTIMIZATION_STATUS.FINISHED.value)]
+        join_ons = [(Store, Store.store_id == cls._model.store_id)]
+        # 数据库端分页，总数单独 count 查询，均使用 (status, updated_at, id) 索引
         df = cls._model.model_query(
             args=args,
-            join_ons=[(Store, Store.store_id == cls._model.store_id)],
-            order_keys=cls._model.updated_at.desc(),
+            join_ons=join_ons,
+            order_keys=[cls._model.updated_at.desc(), cls._model.id.desc()],
             filter_spec=filter_spec,
             df=True,
+            limit=per_page,
+            offset=max(page - 1, 0) * per_page,
         )
+        total_num = cls._model.model_query(
+            args=[func.count(cls._model.id)],
+            join_ons=join_ons,
+            filter_spec=filter_spec,
+        )[0][0]
 
-        df["updated_at"] = df.apply(
-            lambda row: row.updated_at.strftime("%Y年%m月%d"), axis=1
+        df["updated_at"] = pd.to_datetime(df["updated_at"]).dt.strftime(
+            "%Y年%m月%d"
         )
         return {
             "currentPageNum": page,
-            "totalNum": df.__len__(),
-            "optimizations": df[
-                (page - 1) * per_page : page * per_page
-            ].to_dict("record"),
+            "totalNum": total_num,
+            "optimizations": df.to_dict("record"),
         }
 
     def submit_optimization(self):
@@ -163,16 +177,16 @@ class OptimizationService:
         self._obj.target_info = json.dumps(target_info)
 
         db.session.commit()
+        ResponseCacheService.invalidate(RESPONSE_CACHE_NAMESPACE.OPTIMIZATION)
 
-    def gen_order_id(self):
+    @staticmethod
+    def gen_order_id(store_id):
         """
         生成规则: 年+月+日+当天第几个订单
         eg. 20200530001
         """
         _today = get_today_date()
-        optimize_count_key = OPTIMIZE_COUNT_REDIS_KEY.format(
-            store_id=self.store_id
-        )
+        optimize_count_key = OPTIMIZE_COUNT_REDIS_KEY.format(store_id=store_id)
 
         if not redis_client.exists(optimize_count_key):
             # 如果当日没有生成过优化（提交）订单，初始化缓存次数，并设置过期时间为明天0点
@@ -186,7 +200,7 @@ class OptimizationService:
         optimize_cnt = redis_client.incr(optimize_count_key)
 
         order_id = "{store_id}_{today}{cnt}".format(
-            store_id=self.store_id,
+            store_id=store_id,
             today=_today.strftime("%Y%m%d"),
             cnt=str(optimize_cnt).zfill(3),
         )
@@ -239,7 +253,7 @@ class OptimizationService:
         ).merge(sku_qty_price_df, on=merge_on_col)
 
         # 如果重置或者指定 order_id 情况下，使用 order_id 参数值。否则生成新的 order id。
-        order_id = order_id or self.gen_order_id()
+        order_id = order_id or self.gen_order_id(self.store_id)
 
         optimized_order_df["order_id"] = order_id
         optimized_order_df["modify"] = 0
@@ -270,6 +284,7 @@ class OptimizationService:
 
         # 更新优化 _obj 对象为新生成的优化结果对象
         self._init_by_order_id(order_id)
+        ResponseCacheService.invalidate(RESPONSE_CACHE_NAMESPACE.OPTIMIZATION)
 
     def cal_optimization_amount_total(self):
         amount = (
@@ -278,7 +293,7 @@ class OptimizationService:
                     OptimizedOrder.unit_price * OptimizedOrder.replenishment
                 ).label("total")
             )
-            .filter_by(version=self.optimized_order_version)
+            .filter_by(order_id=self._obj.order_id)
             .first()
         )
         return amount.total
@@ -423,8 +438,9 @@ class OptimizationService:
             return optimized_sku_df
         else:
             optimization_results = self._schema.dump(optimization_obj)
+            # sku 明细保持 dataframe，由接口返回格式（records/列式 json、arrow）统一序列化
             optimization_results.update(
-                dict(optimized_sku_info=optimized_sku_df.to_dict("record"))
+                dict(optimized_sku_info=optimized_sku_df)
             )
             return optimization_results
 
@@ -449,48 +465,115 @@ class OptimizationService:
             ],
             sku_optimized_replenish_df,
             on="sku_id",
-        ).to_dict("record")
+        )
+
+        # 按配置以门店库存批次模拟补货后坏货，或合并库存近似计算
+        inventory_cohorts_df = (
+            self.store_inventory_service.get_inventory_cohorts()
+            if replenish_config.EXPIRED_GOODS_MODEL == "cohort"
+            else None
+        )
 
         estimation = replenish_service.get_expired_goods_info(
-            order_info, self.forecast_df, history_inventory_df
+            order_info,
+            self.forecast_df,
+            history_inventory_df,
+            inventory_cohorts_df,
         )
         return estimation
 
     def modify_sku_replenishment(self, sku_modify_info):
-        sku_optimized_updates = []
-        for modify_info in sku_modify_info:
-            # 封装更新数据库数据信息
-            sku_optimized_update = {
-                key: modify_info.pop(key)
-                for key in ("id", "optimized_replenishment", "modify")
-            }
-            sku_optimized_updates.append(sku_optimized_update)
-            # 封装 replenish_service.get_storage_days 接收 order info 参数格式
-            modify_info["replenishment"] = sku_optimized_update.get(
-                "optimized_replenishment"
-            ) + sku_optimized_update.get("modify")
-
-        sku_storage_days = replenish_service.get_storage_days(
-            sku_modify_info, self.forecast_df, self._obj.safe_inventory_days
-        )
-        for sku_optimized in sku_modify_info:
-            sku_optimized.update(
-                dict(
-                    inventory_turnover_days=sku_storage_days.get(
-                        sku_optimized.get("sku_id")
-                    )
-                )
+        """
+        人工修改 sku 补货量，只对被修改的 sku 增量计算：
+            - 查询被修改 sku 的门店库存、单价和修改前补货量，只用这些 sku 的预测结果重新计算库存周转天数
+            - 订单总金额 += 单价 * (修改后补货量 - 修改前补货量)，不再对整个订单重新求和，增量在 UPDATE 语句中累加
+            - 修改前补货量以 SELECT ... FOR UPDATE 读取并锁定 sku 行到事务提交，
+              并发修改同一 sku 时后一个请求等待前一个提交后再读取，增量不会重复或遗漏
+        门店级 optimized_inventory_turnover_days 是初始建议单的库存水平天数（与 sku 的 optimized_* 列相同），修改 sku 时不更新
+        """
+        modify_df = pd.DataFrame(
+            sku_modify_info, columns=["id", "optimized_replenishment", "modify"]
+        )
+        try:
+            # 只更新当前订单下的 sku 记录，按 id 顺序加锁避免并发请求互相死锁
+            previous_df = OptimizedOrder.model_query(
+                args=[
+                    OptimizedOrder.id,
+                    OptimizedOrder.sku_id,
+                    OptimizedOrder.store_inventory,
+                    OptimizedOrder.unit_price,
+                    OptimizedOrder.replenishment.label(
+                        "previous_replenishment"
+                    ),
+                ],
+                filter_spec=[
+                    (OptimizedOrder.order_id, self._obj.order_id),
+                    (OptimizedOrder.id, modify_df["id"].tolist()),
+                ],
+                order_keys=OptimizedOrder.id,
+                df=True,
+                for_update=True,
+            )
+            modify_df = previous_df.merge(modify_df, on="id")
+            modify_df["replenishment"] = (
+                modify_df["optimized_replenishment"] + modify_df["modify"]
             )
 
-        OptimizedOrder.update(sku_optimized_updates)
+            forecast_df = ForecastService(self.version).get_forecast_results(
+                self.store_id, modify_df["sku_id"].tolist()
+            )
+            sku_storage_days = replenish_service.get_storage_days(
+                modify_df[
+                    ["sku_id", "store_inventory", "replenishment"]
+                ].to_dict("record"),
+                forecast_df,
+                self._obj.safe_inventory_days,
+            )
+            modify_df["inventory_turnover_days"] = modify_df["sku_id"].map(
+                sku_storage_days
+            )
 
-        # 将对应的优化状态修改为编辑修改中，待确定状态
-        self._obj.status = OPTIMIZATION_STATUS.UNDETERMINED.value
-        self._obj.order_amount_total = self.cal_optimization_amount_total()
-        db.session.commit()
+            amount_delta = (
+                modify_df["unit_price"].fillna(0)
+                * (
+                    modify_df["replenishment"]
+                    - modify_df["previous_replenishment"]
+                )
+            ).sum()
+            OptimizedOrder.update(
+                OptimizedOrder.convert_df_to_records(
+                    modify_df[
+                        [
+                            "id",
+                            "optimized_replenishment",
+                            "modify",
+                            "inventory_turnover_days",
+                        ]
+                    ]
+                ),
+                commit=False,
+            )
+            # 将对应的优化状态修改为编辑修改中，待确定状态；
+            # 订单总金额在数据库中累加增量，同一订单并发修改时不会覆盖其他请求的修改
+            self._model.query.filter_by(id=self._obj.id).update(
+                {
+                    self._model.status: OPTIMIZATION_STATUS.UNDETERMINED.value,
+                    self._model.order_amount_total: func.coalesce(
+                        self._model.order_amount_total, 0
+                    )
+                    + float(amount_delta),
+                },
+                synchronize_session=False,
+            )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        ResponseCacheService.invalidate(RESPONSE_CACHE_NAMESPACE.OPTIMIZATION)
 
-    def format_download_order_file_name(self, order_type):
-        return f"{self.store_id}_{self._obj.order_id}{OPTIMIZATION_ORDER_TYPE[order_type]}.csv"
+    @staticmethod
+    def format_download_order_file_name(store_id, order_id, order_type):
+        return f"{store_id}_{order_id}{OPTIMIZATION_ORDER_TYPE[order_type]}.csv"
 
     @classmethod
     def order_download(cls, order_ids, order_type):
@@ -522,56 +605,316 @@ class OptimizationService:
                 columns=ORDER_FILE_COLUMNS_MAPPING
             )
 
+        # 一次查询所有订单的 sku 结果，按订单逐个读取
+        orders_df, order_sku_groups = cls.get_orders_sku(order_ids)
+        if orders_df.empty:
+            raise errors.OrderDoesNotExistError
+
+        def _order_files():
+            for order_id, store_id, df in order_sku_groups:
+                # 生成订单文件名
+                order_file_name = cls.format_download_order_file_name(
+                    store_id, order_id, order_type
+                )
+                yield order_file_name, _filter_order_type(df, order_type)
+
         # 单个订单下载
         if len(order_ids) == 1:
-            # 获取对应订单结果
-            order_id = order_ids[0]
-            service = cls(order_id=order_id)
-
-            order_sku_df = service.get_optimization_results(only_order_sku=True)
-            order_sku_df = _filter_order_type(order_sku_df, order_type)
-            order_file_name = service.format_download_order_file_name(
-                order_type
+            order_files = _order_files()
+            order_file_name, order_df = next(order_files)
+            order_files.close()
+            csv_file = BytesIO(order_df.to_csv().encode("utf-8"))
+            return APIDownloadService.download(
+                csv_file, file_name=order_file_name
+            )
+        # 批量下载，csv 直接写入 zip 流式返回
+        elif len(order_ids) > 1:
+            now = get_current_datetime(_datetime_format="%Y%m%d%H%M")
+            zip_file_name = f"{current_user.name}{now}{OPTIMIZATION_ORDER_TYPE[order_type]}.zip"
+            return APIDownloadService.download_csv_zip_stream(
+                _order_files(), file_name=zip_file_name
+            )
+
+    @classmethod
+    def get_orders_sku(cls, order_ids):
+        """
+        批量查询多个订单的 sku 结果，sku 结果以一次查询按订单排序、分批从游标读取，
+        每次只在内存中组装一个订单的 dataframe
+        return:
+            orders_df: order_id, store_id
+            order_sku_groups: generator (order_id, store_id, order_sku_df)，
+                order_sku_df 为 get_optimization_results(only_order_sku=True) 的列，
+                没有 sku 结果的订单最后返回空 dataframe
+        """
+        orders_df = cls._model.model_query(
+            args=[cls._model.order_id, cls._model.store_id],
+            filter_spec=[(cls._model.order_id, list(order_ids))],
+            df=True,
+        ).drop_duplicates("order_id")
+        orders_df["store_id"] = orders_df["store_id"].astype(int)
+
+        query = (
+            db.session.query(
+                OptimizedOrder.order_id,
+                OptimizedOrder.id,
+                OptimizedOrder.sku_id,
+                OptimizedOrder.optimized_replenishment,
+                OptimizedOrder.modify,
+                OptimizedOrder.replenishment,
+                OptimizedOrder.unit_price,
+                OptimizedOrder.store_inventory,
+                OptimizedOrder.inventory_turnover_days,
+                OptimizedOrder.optimized_inventory_turnover_days,
+                SKU.sku_name,
+                SKU.category,
             )
+            .join(SKU, SKU.sku_id == OptimizedOrder.sku_id)
+            .filter(OptimizedOrder.order_id.in_(orders_df["order_id"].tolist()))
+            .order_by(OptimizedOrder.order_id, OptimizedOrder.id)
+            .yield_per(OPTIMIZATION_DOWNLOAD_YIELD_PER)
+        )
+        columns = [column["name"] for column in query.column_descriptions][1:]
 
-            # 临时文件保存结果，供 APIDownloadService 提供下载
-            with NamedTemporaryFile("w+b", suffix=".csv", delete=True) as tf:
-                order_sku_df.to_csv(tf.name)
-                return APIDownloadService.download(
-                    tf.name, file_name=order_file_name
+        def _order_sku_groups():
+            store_ids = dict(orders_df.values.tolist())
+            for order_id, rows in groupby(query, key=itemgetter(0)):
+                yield order_id, store_ids.pop(order_id), pd.DataFrame(
+                    [row[1:] for row in rows], columns=columns
                 )
-        # 批量下载
-        elif len(order_ids) > 1:
-            # 临时文件夹保存结果文件集，方便后续 zip 打包操作
-            with TemporaryDirectory() as td:
-                order_file_names = []
-                for order_id in order_ids:
-                    # 获取对应订单结果
-                    service = cls(order_id=order_id)
-                    order_sku_df = service.get_optimization_results(
-                        only_order_sku=True
-                    )
-                    order_sku_df = _filter_order_type(order_sku_df, order_type)
-                    # 生成订单文件名
-                    order_file_name = service.format_download_order_file_name(
-                        order_type
-                    )
-                    order_file_names.append(order_file_name)
-
-                    order_sku_df.to_csv(td + order_file_name)
-
-                memory_file = BytesIO()
-                with zipfile.ZipFile(
-                    memory_file, "w", zipfile.ZIP_DEFLATED
-                ) as zf:
-                    for order_filename in order_file_names:
-                        with open(td + order_filename, "rb") as fp:
-                            zf.writestr(order_filename, fp.read())
-                # 回归 seek 指针到文件头
-                memory_file.seek(0)
-
-                now = get_current_datetime(_datetime_format="%Y%m%d%H%M")
-                zip_file_name = f"{current_user.name}{now}{OPTIMIZATION_ORDER_TYPE[order_type]}.zip"
-                return APIDownloadService.download(
-                    memory_file, file_name=zip_file_name
+            for order_id, store_id in store_ids.items():
+                yield order_id, store_id, pd.DataFrame(columns=columns)
+
+        return orders_df, _order_sku_groups()
+
+
+class BatchOptimizationService:
+    """
+    多门店批量生成初始化优化结果（每天为所有门店生成建议单）：
+    门店库存、预测结果、仓库库存每张表只查询一次，补货模型按门店分组向量化计算，
+    所有门店的 Optimization / OptimizedOrder 结果在同一个事务中批量写入。
+    """
+
+    _model = Optimization
+    merge_on_cols = ["store_id", "sku_id"]
+
+    def __init__(self, store_ids=None, safety_days=None):
+        self.safety_days = safety_days or OPTIMIZATION_SAFETY_DAYS_DEFAULT
+        self.version = ForecastService().version
+        # 不指定门店时，批量生成全部门店的优化结果
+        self.store_ids = store_ids or list(
+            chain(*db.session.query(Store.store_id).all())
+        )
+
+    def gen_init_optimizations(self, runner=None):
+        """
+        @param runner: ParallelReplenishRunner, 不为空时按门店分片多进程并行计算
+        return: dict {store_id: order_id}
+        """
+        store_inventory_df = self.get_store_inventory()
+        forecast_df = ForecastService(self.version).get_forecast_results(
+            self.store_ids
+        )
+        hub_inventory_df = self.get_hub_inventory()
+
+        if runner is not None:
+            (
+                optimized_order_df,
+                storage_level_df,
+            ) = self.cal_optimizations_parallel(
+                runner, store_inventory_df, forecast_df, hub_inventory_df
+            )
+        else:
+            optimized_order_df, storage_level_df = self.cal_optimizations(
+                store_inventory_df, forecast_df, hub_inventory_df
+            )
+        return self.save_optimizations(optimized_order_df, storage_level_df)
+
+    def get_store_inventory(self):
+        """
+        门店 x 全量 sku 信息，没有最新库存的 sku 补 0，
+        与单门店 get_last_store_inventory(with_sku_info=True) 的结果一致
+        """
+        inventory_df = StoreInventoryService(
+            store_id=self.store_ids
+        ).get_last_store_inventory()
+        inventory_df = inventory_df.rename(columns={"location_id": "store_id"})
+
+        sku_info_df = SKU.model_query(
+            args=[
+                SKU.sku_name,
+                SKU.category,
+                SKU.price.label("unit_price"),
+                SKU.sku_id,
+            ],
+            df=True,
+        )
+        # 门店与全量 sku 做笛卡尔积
+        store_sku_df = (
+            pd.DataFrame({"store_id": self.store_ids, "_key": 1})
+            .merge(sku_info_df.assign(_key=1), on="_key")
+            .drop(columns="_key")
+        )
+        store_inventory_df = store_sku_df.merge(
+            inventory_df, how="left", on=self.merge_on_cols
+        )
+        store_inventory_df["store_inventory"] = store_inventory_df[
+            "store_inventory"
+        ].fillna(0.0)
+        return store_inventory_df
+
+    def get_hub_inventory(self):
+        """
+        查询所有门店对应仓库的最新库存，并按补货关系分配到门店维度
+        """
+        store_hub_df = HubService.get_store_hubs(self.store_ids)
+        if store_hub_df.empty:
+            return pd.DataFrame(columns=["store_id", "sku_id", "qty"])
+
+        hub_inventory_df = HubInventoryService(
+            hub_id=store_hub_df.hub_id.tolist()
+        ).get_last_hub_inventory()
+        hub_inventory_df = hub_inventory_df.merge(
+            store_hub_df, left_on="location_id", right_on="hub_id"
+        )
+        # hub.store_id 为字符串类型，与门店库存 store_id 保持一致
+        hub_inventory_df["store_id"] = hub_inventory_df["store_id"].astype(int)
+        return hub_inventory_df[["store_id", "sku_id", "qty"]]
+
+    def cal_optimizations(
+        self, store_inventory_df, forecast_df, hub_inventory_df
+    ):
+        """
+        return:
+            optimized_order_df: 所有门店 sku 的建议补货量、周转天数
+            storage_level_df: index 为 store_id 的补货前后库存水平天数
+        """
+        quantity_df = replenish_service.get_batch_predict_quantity(
+            store_inventory_df, forecast_df, hub_inventory_df, self.safety_days,
+        )
+        optimized_order_df = store_inventory_df[
+            self.merge_on_cols + ["unit_price", "store_inventory"]
+        ].merge(quantity_df, how="left", on=self.merge_on_cols)
+        # 不在预测结果中的 sku 建议补货量为 0
+        optimized_order_df["optimized_replenishment"] = optimized_order_df.pop(
+            "quantity"
+        ).fillna(0)
+
+        # 供计算周转天数等接口使用的 sku 补货量信息
+        replenish_info = optimized_order_df.rename(
+            columns={"optimized_replenishment": "replenishment"}
+        )
+        optimized_order_df[
+            "optimized_inventory_turnover_days"
+        ] = replenish_service.get_batch_storage_days(
+            replenish_info, forecast_df, self.safety_days
+        )
+        storage_level_df = replenish_service.get_batch_storage_level(
+            replenish_info, forecast_df
+        )
+        return optimized_order_df, storage_level_df
+
+    def cal_optimizations_parallel(
+        self, runner, store_inventory_df, forecast_df, hub_inventory_df
+    ):
+        """
+        与 cal_optimizations 结果一致，门店拆分为 numpy 数组后交给子进程计算，
+        每个门店的计算耗时记录在 runner.timings
+        """
+        store_inputs = pack_store_inputs(
+            store_inventory_df, forecast_df, hub_inventory_df
+        )
+        order_df, storage_level_df = runner.concat_results(
+            runner.run(store_inputs, self.safety_days)
+        )
+        order_df = order_df.rename(
+            columns={
+                "replenishment": "optimized_replenishment",
+                "storage_days": "optimized_inventory_turnover_days",
+            }
+        )
+        store_inventory_df = store_inventory_df[
+            self.merge_on_cols + ["unit_price", "store_inventory"]
+        ].astype({"sku_id": str})
+        optimized_order_df = store_inventory_df.merge(
+            order_df, how="left", on=self.merge_on_cols
+        )
+        return optimized_order_df, storage_level_df
+
+    def save_optimizations(self, optimized_order_df, storage_level_df):
+        # 如果安全库存天数不是默认 7 天，状态为修改未确定中
+        if self.safety_days != OPTIMIZATION_SAFETY_DAYS_DEFAULT:
+            status = OPTIMIZATION_STATUS.UNDETERMINED.value
+        else:
+            status = OPTIMIZATION_STATUS.INIT.value
+
+        order_ids = {
+            store_id: OptimizationService.gen_order_id(store_id)
+            for store_id in self.store_ids
+        }
+        optimized_order_df["order_id"] = optimized_order_df["store_id"].map(
+            order_ids
+        )
+        optimized_order_df["modify"] = 0
+
+        # 用 sku 单价 * 建议补货量 = 订单总金额
+        order_amount = (
+            optimized_order_df.unit_price
+            * optimized_order_df.optimized_replenishment
+        )
+        amount_total = order_amount.groupby(optimized_order_df.store_id).sum()
+
+        optimization_data_df = pd.DataFrame(
+            dict(
+                store_id=self.store_ids,
+                order_id=[order_ids[store_id] for store_id in self.store_ids],
+            )
+        )
+        storage_level_df = storage_level_df.reindex(self.store_ids).fillna(0)
+        # 库存周转天数向上取整
+        optimization_data_df["current_inventory_turnover_days"] = np.ceil(
+            storage_level_df["level_before"].values
+        ).astype(int)
+        optimization_data_df["optimized_inventory_turnover_days"] = np.ceil(
+            storage_level_df["level_after"].values
+        ).astype(int)
+        optimization_data_df["order_amount_total"] = (
+            amount_total.reindex(self.store_ids).fillna(0).values
+        )
+        optimization_data_df["version"] = self.version
+        optimization_data_df["safe_inventory_days"] = self.safety_days
+        optimization_data_df["status"] = status
+
+        try:
+            # 删除这些门店在当前预测版本下之前生成的未提交优化结果
+            previous_optimizations = (
+                db.session.query(self._model.id, self._model.order_id)
+                .filter(
+                    self._model.version == self.version,
+                    self._model.store_id.in_(self.store_ids),
+                    self._model.status != OPTIMIZATION_STATUS.FINISHED.value,
+                )
+                .all()
+            )
+            if previous_optimizations:
+                optimization_ids, previous_order_ids = zip(
+                    *previous_optimizations
                 )
+                OptimizedOrder.delete(
+                    [(OptimizedOrder.order_id, list(previous_order_ids))],
+                    commit=False,
+                )
+                self._model.delete(
+                    [(self._model.id, list(optimization_ids))], commit=False
+                )
+
+            # 门店 x sku 的结果行数很多，以 Core executemany 写入，不创建 ORM 对象
+            OptimizedOrder.bulk_insert(
+                optimized_order_df.drop(columns="store_id"), commit=False
+            )
+            self._model.bulk_insert(optimization_data_df, commit=False)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        ResponseCacheService.invalidate(RESPONSE_CACHE_NAMESPACE.OPTIMIZATION)
+        return order_ids
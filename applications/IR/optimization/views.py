@@ -3,7 +3,10 @@
 优化模块调用 api 接口
 """
 from flask_restful import Resource, reqparse
+from applications.IR.api.cache import cached_response
+from applications.IR.api.config import RESPONSE_CACHE_NAMESPACE
 from applications.IR.optimization.service import OptimizationService
+from celery_tasks.optimization_tasks import gen_stores_optimizations
 from config import RESPONSE_CREATED_SUCCESS_CODE
 from replenish.utils import parse_expired_info
 
@@ -66,10 +69,34 @@ class StoreOptimizationViewAPI(Resource):
         )
 
 
+class StoresOptimizationViewAPI(Resource):
+    def __init__(self):
+        self.reqparse = reqparse.RequestParser()
+        # 不指定门店时，批量生成全部门店的优化结果
+        self.reqparse.add_argument(
+            "store_ids", type=list, location="json", required=False
+        )
+        self.reqparse.add_argument(
+            "safety_days", type=int, location="json", required=False
+        )
+        super(StoresOptimizationViewAPI, self).__init__()
+
+    def post(self):
+        """
+        批量生成多门店初始化优化结果，celery 异步任务执行
+        """
+        args = self.reqparse.parse_args()
+        gen_stores_optimizations.delay(
+            args.get("store_ids"), args.get("safety_days")
+        )
+        return {}, RESPONSE_CREATED_SUCCESS_CODE
+
+
 class StoreOptimizationStatusViewAPI(Resource):
     def __init__(self):
         self.service = OptimizationService
 
+    @cached_response(RESPONSE_CACHE_NAMESPACE.OPTIMIZATION)
     def get(self):
         """
         获取门店对应当前是否有优化进度的状态接口
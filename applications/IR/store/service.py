@@ -19,3 +19,15 @@ class HubService:
             args=[cls._model.hub_id], filter_spec=filter_spec
         )
         return chain(*hub_id)
+
+    @classmethod
+    def get_store_hubs(cls, store_ids):
+        """
+        多门店对应的补货仓库关系 dataframe: hub_id, store_id
+        """
+        filter_spec = [(cls._model.store_id, store_ids)]
+        return cls._model.model_query(
+            args=[cls._model.hub_id, cls._model.store_id],
+            filter_spec=filter_spec,
+            df=True,
+        )
@@ -3,6 +3,8 @@
 业务门店模块调用 api 接口
 """
 from flask_restful import Resource
+from applications.IR.api.cache import cached_response
+from applications.IR.api.config import RESPONSE_CACHE_NAMESPACE
 from applications.IR.store.service import StoreService
 from applications.IR.store.models import StoreSchema
 
@@ -18,6 +20,7 @@ class StoreViewAPI(Resource):
 
         super(StoreViewAPI, self).__init__()
 
+    @cached_response(RESPONSE_CACHE_NAMESPACE.STORE)
     def get(self):
         stores = self.service._model.model_query()
         return self.schema.dump(stores)
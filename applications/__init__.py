@@ -1,5 +1,4 @@
 # coding: utf-8
-import pandas as pd
 from json import dumps
 
 from flask import Blueprint, Response, current_app, make_response
@@ -11,7 +10,20 @@ from applications.IR import (
     IR_apis,
     IR_bps,
 )
-from config import RESPONSE_SUCCESS_CODE, RESPONSE_SUCCESS_MSG, app_config
+from common.arrow_serializers import (
+    ArrowSerializer,
+    ParquetSerializer,
+    is_arrow_available,
+)
+from common.json_serializers import get_json_serializer
+from config import (
+    RESPONSE_ARROW_MIMETYPE,
+    RESPONSE_COLUMNAR_JSON_MIMETYPE,
+    RESPONSE_PARQUET_MIMETYPE,
+    RESPONSE_SUCCESS_CODE,
+    RESPONSE_SUCCESS_MSG,
+    app_config,
+)
 
 
 exception_bp = Blueprint("exception", __name__)
@@ -54,24 +66,9 @@ def configure_blueprints(app):
 apis = [user_api, *IR_apis]
 
 
-@demo_api.representation("application/json")
-def output_json(
-    data, code=RESPONSE_SUCCESS_CODE, message=RESPONSE_SUCCESS_MSG, headers=None
-):
+def _output_json(data, code, message, headers, orient):
     """Makes a Flask response with a JSON encoded body"""
 
-    # 此处为自定义添加***************
-    # if 'message' not in data:
-    data = {
-        "code": code,
-        "message": message,
-        # 如果 service 接口返回 dataframe，这里统一做 record 转换
-        "data": data.to_dict("record")
-        if isinstance(data, pd.DataFrame)
-        else data,
-    }
-    # **************************
-
     settings = current_app.config.get("RESTFUL_JSON", {})
 
     # If we're in debug mode, and the indent is not set, we set it to a
@@ -81,15 +78,77 @@ def output_json(
         settings.setdefault("indent", 4)
         settings.setdefault("sort_keys", not PY3)
 
+    # 此处为自定义添加***************
+    # 如果 service 接口返回 dataframe，serializer 直接列式序列化，不再转换为 record dict list
+    serializer = get_json_serializer(current_app.config.get("JSON_SERIALIZER"))
     # always end the json dumps with a new line
     # see https://github.com/mitsuhiko/flask/pull/1262
-    dumped = dumps(data, **settings) + "\n"
+    dumped = (
+        serializer.dumps_response(code, message, data, orient, **settings)
+        + "\n"
+    )
+    # **************************
 
     resp = make_response(dumped, RESPONSE_SUCCESS_CODE)
     resp.headers.extend(headers or {})
     return resp
 
 
-# 通过赋值的方式给 output_json 函数加装饰器
+@demo_api.representation("application/json")
+def output_json(
+    data, code=RESPONSE_SUCCESS_CODE, message=RESPONSE_SUCCESS_MSG, headers=None
+):
+    return _output_json(data, code, message, headers, orient="records")
+
+
+def output_columnar_json(
+    data, code=RESPONSE_SUCCESS_CODE, message=RESPONSE_SUCCESS_MSG, headers=None
+):
+    """
+    列式 json，dataframe 数据返回 {"columns": [...], "data": [[...]]}，不重复每行的列名
+    """
+    return _output_json(data, code, message, headers, orient="split")
+
+
+def output_arrow(
+    data, code=RESPONSE_SUCCESS_CODE, message=RESPONSE_SUCCESS_MSG, headers=None
+):
+    resp = make_response(
+        ArrowSerializer().dumps_response(code, message, data),
+        RESPONSE_SUCCESS_CODE,
+    )
+    resp.headers.extend(headers or {})
+    return resp
+
+
+def output_parquet(
+    data, code=RESPONSE_SUCCESS_CODE, message=RESPONSE_SUCCESS_MSG, headers=None
+):
+    resp = make_response(
+        ParquetSerializer().dumps_response(code, message, data),
+        RESPONSE_SUCCESS_CODE,
+    )
+    resp.headers.extend(headers or {})
+    return resp
+
+
+"""
+前端通过请求头 Accept 选择返回格式，未指定或 Accept: */* 时为默认的 application/json，
+Arrow / Parquet 格式只在安装了 pyarrow 时注册
+"""
+representations = [
+    ("application/json", output_json),
+    (RESPONSE_COLUMNAR_JSON_MIMETYPE, output_columnar_json),
+]
+if is_arrow_available():
+    representations.extend(
+        [
+            (RESPONSE_ARROW_MIMETYPE, output_arrow),
+            (RESPONSE_PARQUET_MIMETYPE, output_parquet),
+        ]
+    )
+
+# 通过赋值的方式给 output_json 等函数加装饰器
 for api in apis:
-    output_json = api.representation("application/json")(output_json)
+    for mediatype, representation in representations:
+        api.representation(mediatype)(representation)
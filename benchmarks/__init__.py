@@ -0,0 +1,5 @@
+# coding: utf-8
+"""
+性能回归基准脚本（非单元测试），使用固定随机种子生成的模拟数据，
+对比优化前后实现的计算结果与耗时。运行方式: python -m benchmarks.<module>
+"""
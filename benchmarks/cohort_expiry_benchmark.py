@@ -0,0 +1,110 @@
+# coding: utf-8
+"""
+补货后坏货预测基准：按批次先进先出模拟（CohortExpiryModel）与合并库存近似计算的耗时和预测坏货对比，
+并以逐天模拟的对照实现校验向量化模拟结果
+
+> python -m benchmarks.cohort_expiry_benchmark --skus 1000 10000 100000 --verify-skus 2000
+"""
+
+import argparse
+
+import numpy as np
+
+from benchmarks import generators
+from benchmarks.replenish_benchmark import gen_inputs, measure
+from replenish import service as replenish_service
+from replenish.data_holder import ForecastHolder, InventoryCohortHolder
+from replenish.model.cohort_expiry_model import CohortExpiryModel
+
+
+def verify(order_info, forecast, inventory_cohorts):
+    """
+    向量化模拟与逐天模拟对照实现的最大差值
+    """
+    forecast_holder = ForecastHolder()
+    forecast_holder.load_and_process(forecast)
+    cohort_holder = InventoryCohortHolder()
+    cohort_holder.load_and_process(inventory_cohorts)
+
+    order_columns = replenish_service.get_order_columns(
+        order_info,
+        ["store_inventory", "replenishment", "unit_price", "shelf_life"],
+    )
+    daily_forecast = forecast_holder.daily_forecast(order_columns["sku_id"])
+    remaining_days, qty = CohortExpiryModel._build_cohorts(
+        order_columns["sku_id"],
+        order_columns["store_inventory"],
+        order_columns["replenishment"],
+        order_columns["shelf_life"],
+        cohort_holder,
+    )
+    vectorized = CohortExpiryModel._simulate_vectorized(
+        remaining_days, qty, daily_forecast
+    )
+    daily = CohortExpiryModel._simulate_daily(
+        remaining_days, qty, daily_forecast
+    )
+    return np.abs(vectorized - daily).max()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--skus", type=int, nargs="*", default=[1000, 10000, 100000]
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-cohorts", type=int, default=4)
+    parser.add_argument(
+        "--verify-skus",
+        type=int,
+        default=2000,
+        help="与逐天模拟对照实现校验的 sku 数量，0 为不校验",
+    )
+    args = parser.parse_args()
+
+    if args.verify_skus:
+        _, forecast, _, _, order_info = gen_inputs(args.verify_skus, args.seed)
+        inventory_cohorts = generators.gen_inventory_cohorts(
+            order_info, args.seed, args.max_cohorts
+        )
+        print(
+            "skus: {:>8}  vectorized vs daily max abs diff: {:.6f}".format(
+                args.verify_skus,
+                verify(order_info, forecast, inventory_cohorts),
+            )
+        )
+
+    for skus in args.skus:
+        _, forecast, _, history_inventory, order_info = gen_inputs(
+            skus, args.seed
+        )
+        inventory_cohorts = generators.gen_inventory_cohorts(
+            order_info, args.seed, args.max_cohorts
+        )
+        for name, cohorts in [
+            ("lump", None),
+            ("cohort", inventory_cohorts),
+        ]:
+            func = lambda: replenish_service.get_expired_goods_info(
+                order_info, forecast, history_inventory, cohorts
+            )
+            seconds, peak = measure(func, args.repeat)
+            expired_info = func()
+            cur_expired_info = expired_info[max(expired_info)]
+            print(
+                "skus: {:>8}  {:>6}: {:.4f}s  peak: {:>7.1f}MB  "
+                "expired qty: {:>12.1f}  amount: {:>14.1f}  ratio: {:.4f}".format(
+                    skus,
+                    name,
+                    seconds,
+                    peak / 1024 / 1024,
+                    cur_expired_info["expired_qty"],
+                    cur_expired_info["expired_amount"],
+                    cur_expired_info["ratio"],
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# coding: utf-8
+"""
+库存新鲜度分类基准：逐行 apply map_inventory_freshness 与向量化 map_inventory_freshness_array 对比
+
+> python -m benchmarks.freshness_benchmark --rows 10000 100000
+"""
+
+import argparse
+import datetime
+import time
+
+import numpy as np
+import pandas as pd
+
+from applications.IR.invoicing.service import StoreInventoryService
+
+
+def gen_inventory_df(rows, seed=0):
+    rng = np.random.RandomState(seed)
+    inventory_date = datetime.datetime(2020, 6, 1)
+    return pd.DataFrame(
+        {
+            "date": inventory_date,
+            # 包含生产日期晚于上传日期（新鲜度为负）的情况
+            "production_dte": inventory_date
+            - pd.to_timedelta(rng.randint(-10, 400, rows), unit="D"),
+            "shelf_life": rng.choice([30, 90, 180, 365], rows),
+        }
+    )
+
+
+def run_apply(inventory_df):
+    return inventory_df.apply(
+        lambda row: StoreInventoryService.map_inventory_freshness(
+            row.date, row.production_dte, row.shelf_life
+        ),
+        axis=1,
+    ).values
+
+
+def run_vectorized(inventory_df):
+    return StoreInventoryService.map_inventory_freshness_array(
+        inventory_df["date"],
+        inventory_df["production_dte"],
+        inventory_df["shelf_life"],
+    )
+
+
+def timeit(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--rows", type=int, nargs="*", default=[1000, 10000, 100000]
+    )
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        inventory_df = gen_inventory_df(rows)
+        expected, apply_seconds = timeit(run_apply, inventory_df)
+        result, vectorized_seconds = timeit(run_vectorized, inventory_df)
+        # 结果必须与逐行计算完全一致
+        assert np.array_equal(expected, result)
+        print(
+            "rows: {:>8}  apply: {:.4f}s  vectorized: {:.4f}s  speedup: {:.1f}x".format(
+                rows,
+                apply_seconds,
+                vectorized_seconds,
+                apply_seconds / max(vectorized_seconds, 1e-9),
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+# coding: utf-8
+"""
+补货计算基准使用的模拟数据，相同 skus 和 seed 生成完全相同的数据，格式与 replenish.service 各接口入参一致
+"""
+
+import numpy as np
+import pandas as pd
+
+from replenish.config import HISTORY_INVENTORY_CONFIG
+
+WEEKS = ["2020-w20", "2020-w21", "2020-w22", "2020-w23"]
+
+
+def gen_sku_ids(skus):
+    return (10000000 + np.arange(skus)).astype(str)
+
+
+def gen_order_template(skus, seed=0):
+    """
+    门店订单模板: sku_id, sku_name, category, unit_price, store_inventory
+    约 1% sku 没有门店库存（NaN）
+    """
+    rng = np.random.RandomState(seed)
+    store_inventory = rng.randint(0, 50, skus).astype(float)
+    store_inventory[rng.rand(skus) < 0.01] = np.nan
+    return pd.DataFrame(
+        {
+            "sku_id": gen_sku_ids(skus),
+            "sku_name": "sku",
+            "category": rng.choice(["Chocolate", "Gum", "Candy"], skus),
+            "unit_price": rng.uniform(1, 1000, skus).round(2),
+            "store_inventory": store_inventory,
+        }
+    )
+
+
+def gen_forecast(skus, seed=0, coverage=0.9):
+    """
+    预测结果: sku_id, qty_mean, qty_std
+    只覆盖前 coverage 比例的 sku，约 5% 预测均值为负
+    """
+    rng = np.random.RandomState(seed + 1)
+    forecast_skus = int(skus * coverage)
+    return pd.DataFrame(
+        {
+            "sku_id": gen_sku_ids(forecast_skus),
+            "qty_mean": rng.normal(20, 10, forecast_skus).round(2),
+            "qty_std": rng.uniform(0, 5, forecast_skus).round(2),
+        }
+    )
+
+
+def gen_hub_inventory(skus, seed=0, duplicate_ratio=0.1):
+    """
+    仓库库存: sku_id, qty, location_id
+    部分 sku 有多条库存记录，由 HubInventoryHolder 按 sku 汇总
+    """
+    rng = np.random.RandomState(seed + 2)
+    sku_ids = gen_sku_ids(skus)
+    sku_ids = np.concatenate(
+        [sku_ids, rng.choice(sku_ids, int(skus * duplicate_ratio))]
+    )
+    return pd.DataFrame(
+        {
+            "sku_id": sku_ids,
+            "qty": rng.randint(0, 100, len(sku_ids)).astype(float),
+            "location_id": "hub",
+        }
+    )
+
+
+def gen_history_inventory(skus, seed=0, weeks=WEEKS):
+    """
+    过去四周（含当前周）门店库存: week, sku_id, quality, qty, amount，每周每个 sku 一行
+    """
+    rng = np.random.RandomState(seed + 3)
+    qualities = list(HISTORY_INVENTORY_CONFIG["sku_quality_mapping"].values())
+    rows = skus * len(weeks)
+    return pd.DataFrame(
+        {
+            "week": np.repeat(weeks, skus),
+            "sku_id": np.tile(gen_sku_ids(skus), len(weeks)),
+            "quality": rng.choice(qualities, rows),
+            "qty": rng.randint(0, 50, rows).astype(float),
+            "amount": rng.uniform(0, 5000, rows).round(2),
+        }
+    )
+
+
+def gen_order_info(order_template, sku_replenish_quantity, seed=0):
+    """
+    订单信息: [{"sku_id", "store_inventory", "replenishment", "unit_price", "shelf_life"}]
+    """
+    rng = np.random.RandomState(seed + 4)
+    return [
+        {
+            "sku_id": sku_id,
+            "store_inventory": 0.0 if np.isnan(inventory) else inventory,
+            "replenishment": sku_replenish_quantity.get(sku_id, 0),
+            "unit_price": unit_price,
+            "shelf_life": shelf_life,
+        }
+        for sku_id, inventory, unit_price, shelf_life in zip(
+            order_template["sku_id"].tolist(),
+            order_template["store_inventory"].tolist(),
+            order_template["unit_price"].tolist(),
+            rng.choice([30, 90, 180, 365], len(order_template)).tolist(),
+        )
+    ]
+
+
+def gen_inventory_cohorts(
+    order_info, seed=0, max_cohorts=4, inventory_date="2020-06-01"
+):
+    """
+    门店库存批次: sku_id, qty, date, production_dte
+    每个有库存的 sku 拆分为 1 ~ max_cohorts 批，库存天数在 [0, 1.1 * 保质期] 内，约 1/11 的批次已过期
+    """
+    rng = np.random.RandomState(seed + 5)
+    sku_ids = np.array([row["sku_id"] for row in order_info])
+    store_inventory = np.array([row["store_inventory"] for row in order_info])
+    shelf_life = np.array([row["shelf_life"] for row in order_info])
+
+    cohorts = np.where(
+        store_inventory > 0,
+        rng.randint(1, max_cohorts + 1, len(order_info)),
+        0,
+    )
+    rows = np.repeat(np.arange(len(order_info)), cohorts)
+    weights = rng.rand(len(rows))
+    qty = (
+        weights
+        / np.bincount(rows, weights, minlength=len(order_info))[rows]
+        * store_inventory[rows]
+    )
+    age_days = rng.randint(0, (shelf_life[rows] * 1.1).astype(int) + 1)
+    inventory_date = pd.Timestamp(inventory_date)
+    return pd.DataFrame(
+        {
+            "sku_id": sku_ids[rows],
+            "qty": qty.round(2),
+            "date": inventory_date,
+            "production_dte": inventory_date
+            - pd.to_timedelta(age_days, unit="D"),
+        }
+    )
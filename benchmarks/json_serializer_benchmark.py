@@ -0,0 +1,99 @@
+# coding: utf-8
+"""
+接口响应 json 序列化基准：原 output_json（to_dict("record") + json.dumps）与
+common.json_serializers 中 dataframe 列式序列化对比耗时和内存峰值
+
+> python -m benchmarks.json_serializer_benchmark --rows 1000 20000
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from common.json_serializers import JSON_SERIALIZERS, get_json_serializer
+from config import RESPONSE_SUCCESS_CODE, RESPONSE_SUCCESS_MSG
+
+
+def gen_optimized_sku_df(rows, seed=0):
+    # 模拟优化结果 sku 明细（get_optimization_results 中 optimized_sku_info）
+    rng = np.random.RandomState(seed)
+    return pd.DataFrame(
+        {
+            "id": np.arange(rows),
+            "sku_id": (10000000 + np.arange(rows)).astype(str),
+            "optimized_replenishment": rng.randint(0, 100, rows).astype(float),
+            "modify": rng.randint(-5, 5, rows),
+            "replenishment": rng.randint(0, 100, rows).astype(float),
+            "unit_price": rng.uniform(1, 1000, rows).round(2),
+            "store_inventory": rng.uniform(0, 50, rows).round(1),
+            "inventory_turnover_days": rng.randint(0, 60, rows),
+            "optimized_inventory_turnover_days": rng.randint(0, 60, rows),
+            "sku_name": ["德芙牛奶7.5g散1x1000"] * rows,
+            "category": rng.choice(["Chocolate", "Gum", "Candy"], rows),
+        }
+    )
+
+
+def run_records(df):
+    data = {
+        "code": RESPONSE_SUCCESS_CODE,
+        "message": RESPONSE_SUCCESS_MSG,
+        "data": df.to_dict("record"),
+    }
+    return json.dumps(data)
+
+
+def run_serializer(name):
+    serializer = get_json_serializer(name)
+
+    def _run(df):
+        return serializer.dumps_response(
+            RESPONSE_SUCCESS_CODE, RESPONSE_SUCCESS_MSG, df
+        )
+
+    return _run
+
+
+def measure(func, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, seconds, peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--rows", type=int, nargs="*", default=[1000, 20000, 100000]
+    )
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        df = gen_optimized_sku_df(rows)
+        expected, seconds, peak = measure(run_records, df)
+        print(
+            "rows: {:>8}  {:>8}: {:.4f}s  peak: {:.1f}MB".format(
+                rows, "records", seconds, peak
+            )
+        )
+        for name in JSON_SERIALIZERS:
+            serializer = run_serializer(name)
+            result, seconds, peak = measure(serializer, df)
+            # 反序列化结果必须与原实现一致
+            assert json.loads(result) == json.loads(expected)
+            print(
+                "rows: {:>8}  {:>8}: {:.4f}s  peak: {:.1f}MB".format(
+                    rows, get_json_serializer(name).name, seconds, peak
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,422 @@
+# coding: utf-8
+"""
+IR 接口端到端压测：以本地 SQLite（或 --database-uri 指定的本地 MySQL 空库）和 fakeredis 代替线上服务启动 app，
+写入模拟的门店、SKU、门店/仓库库存和预测数据后，多个计划员线程并发地对各自负责的门店走完
+    门店优化状态 -> 生成优化结果 -> 查看 -> 逐个修改 sku -> 预估坏货 -> 提交 -> 下载订单
+流程，输出每个接口的 p50/p95/p99 延迟和吞吐量
+
+> python -m benchmarks.load_test --stores 20 --skus 2000 --planners 8 --edits 10 --output load.json
+
+fakeredis 为压测额外依赖，不在 requirements 中
+"""
+
+import argparse
+import datetime
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import generators
+from benchmarks.replenish_benchmark import get_git_commit
+
+FORECAST_VERSION = "load_test"
+PLANNER_PASSWORD = "load_test_pwd"
+
+
+def create_load_test_app(database_uri):
+    """
+    替换数据库和 redis 后创建 app，需要在导入 app_main 前修改配置
+    """
+    import fakeredis
+    from common import redis_client
+    from config import app_config
+
+    app_config.SQLALCHEMY_DATABASE_URI = database_uri
+    app_config.DEBUG = False
+    if database_uri.startswith("sqlite"):
+        # 多个计划员线程并发写入时等待 sqlite 写锁
+        app_config.SQLALCHEMY_ENGINE_OPTIONS = {"connect_args": {"timeout": 60}}
+    redis_client.connection_pool = fakeredis.FakeStrictRedis(
+        decode_responses=True
+    ).connection_pool
+
+    from app_main import create_app
+
+    app = create_app()
+    # 每个请求的查询统计日志会淹没压测结果，压测只输出汇总
+    logging.getLogger("common.query_stats").setLevel(logging.WARNING)
+    return app
+
+
+def prepare_sqlite_schema():
+    """
+    sqlite 建表兼容：索引名在整个数据库内唯一（MySQL 为表内唯一），索引名加表名前缀；
+    MySQL TINYINT 类型在 sqlite 中按 SMALLINT 建表
+    """
+    from sqlalchemy.dialects.mysql import TINYINT
+    from sqlalchemy.ext.compiler import compiles
+
+    from common import db
+
+    @compiles(TINYINT, "sqlite")
+    def compile_tinyint(element, compiler, **kwargs):
+        return "SMALLINT"
+
+    for table in db.metadata.tables.values():
+        for index in table.indexes:
+            if not index.name.startswith(table.name):
+                index.name = f"{table.name}_{index.name}"
+
+
+def seed_data(stores, skus, planners, seed):
+    """
+    写入模拟数据，返回门店 id 列表
+        - 门店、对应补货仓库、SKU 主数据
+        - 每个门店过去四周每周一次的 sku 库存，仓库最新库存
+        - 每个门店当前预测版本的 sku 预测结果，并构建预测结果缓存
+        - 计划员账号
+    """
+    from applications.IR.configuration import config as configuration_config
+    from applications.IR.forecast.models import Forecast
+    from applications.IR.forecast.service import ForecastCacheService
+    from applications.IR.invoicing import HubInventory, StoreInventory
+    from applications.IR.invoicing.service import StoreInventoryService
+    from applications.IR.sku import SKU
+    from applications.IR.store import Hub, Store
+    from applications.user import user_datastore
+    from applications.user.config import User_Status
+    from common import db, redis_client
+
+    rng = np.random.RandomState(seed)
+    store_ids = list(range(1, stores + 1))
+    sku_ids = generators.gen_sku_ids(skus)
+    today = datetime.datetime.combine(datetime.date.today(), datetime.time())
+
+    Store.bulk_insert(
+        pd.DataFrame(
+            {
+                "store_id": store_ids,
+                "store_name": [f"门店{store_id}" for store_id in store_ids],
+                "gsv": rng.uniform(1e5, 1e6, stores).round(2),
+                "province": "上海",
+                "city": "上海",
+                "region": "华东",
+                "opening_dte": datetime.datetime(2018, 1, 1),
+            }
+        )
+    )
+    Hub.bulk_insert(
+        pd.DataFrame(
+            {
+                "hub_id": [f"H{store_id}" for store_id in store_ids],
+                "store_id": [str(store_id) for store_id in store_ids],
+                "hub_name": [f"仓库{store_id}" for store_id in store_ids],
+            }
+        )
+    )
+    order_template = generators.gen_order_template(skus, seed)
+    shelf_life = rng.choice([30, 90, 180, 365], skus)
+    SKU.bulk_insert(
+        pd.DataFrame(
+            {
+                "sku_id": sku_ids,
+                "category": order_template["category"],
+                "brand": "brand",
+                "sub_brand": "sub_brand",
+                "barcode": 6900000000000 + np.arange(skus),
+                "sku_name": [f"SKU{sku_id}" for sku_id in sku_ids],
+                "name_en": "sku",
+                "cost": order_template["unit_price"] * 0.6,
+                "shelf_life": shelf_life,
+                "pack_size": "1x1",
+                "net_weight": 1.0,
+                "moq": 1.0,
+                "moa": 1.0,
+                "price": order_template["unit_price"],
+                "is_seasonal": False,
+                "status": True,
+            }
+        )
+    )
+
+    for store_id in store_ids:
+        store_seed = seed + store_id
+        # 过去四周（含当前周）每周一次库存上传
+        store_inventory = pd.concat(
+            [
+                generators.gen_order_template(skus, store_seed + week)[
+                    ["sku_id", "store_inventory"]
+                ].assign(date=today - datetime.timedelta(days=7 * week))
+                for week in range(4)
+            ],
+            ignore_index=True,
+        )
+        store_inventory["qty"] = store_inventory["store_inventory"].fillna(0)
+        store_inventory["amount"] = store_inventory["qty"] * 10
+        store_inventory["location_id"] = store_id
+        store_inventory["production_dte"] = store_inventory[
+            "date"
+        ] - pd.to_timedelta(rng.randint(0, 400, len(store_inventory)), unit="D")
+        StoreInventory.bulk_insert(
+            store_inventory.drop(columns="store_inventory"), commit=False
+        )
+
+        hub_inventory = generators.gen_hub_inventory(skus, store_seed)
+        hub_inventory["location_id"] = f"H{store_id}"
+        hub_inventory["amount"] = hub_inventory["qty"] * 10
+        hub_inventory["date"] = today
+        HubInventory.bulk_insert(hub_inventory, commit=False)
+
+        forecast = generators.gen_forecast(skus, store_seed)
+        forecast["version"] = FORECAST_VERSION
+        forecast["store_id"] = store_id
+        forecast["predict_week"] = "w1"
+        forecast["run_week"] = "w0"
+        forecast["price"] = 1.0
+        Forecast.bulk_insert(forecast, commit=False)
+        db.session.commit()
+
+    StoreInventoryService.refresh_snapshot()
+    redis_client.hset(
+        configuration_config.CONFIGURATION_REDIS_KEY,
+        configuration_config.CONFIGURATION_VERSION_KEY,
+        FORECAST_VERSION,
+    )
+    ForecastCacheService.build(FORECAST_VERSION)
+
+    for planner in range(planners):
+        user_datastore.create_user(
+            name=f"planner{planner}",
+            email=f"planner{planner}@load.test",
+            password=PLANNER_PASSWORD,
+            active=True,
+            status=User_Status.APPROVED.value,
+        )
+    db.session.commit()
+    return store_ids
+
+
+class LoadStats:
+    """
+    线程安全地记录每个接口每次请求的延迟和是否成功
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def request(self, client, name, method, url, **kwargs):
+        start = time.perf_counter()
+        response = getattr(client, method)(url, **kwargs)
+        seconds = time.perf_counter() - start
+
+        body = None
+        ok = response.status_code < 400
+        if ok and response.mimetype == "application/json":
+            body = json.loads(response.get_data(as_text=True))
+            # 系统封装的 exception 也返回 200，以返回结构中的 code 判断
+            ok = body.get("code") in (200, 201)
+        with self._lock:
+            self.latencies[name].append(seconds)
+            if not ok:
+                self.errors[name] += 1
+        return body if ok else None
+
+    def report(self, wall_seconds):
+        report = {}
+        for name, latencies in self.latencies.items():
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+            report[name] = {
+                "requests": len(latencies),
+                "errors": self.errors[name],
+                "p50_ms": round(p50, 2),
+                "p95_ms": round(p95, 2),
+                "p99_ms": round(p99, 2),
+                "max_ms": round(max(latencies) * 1000, 2),
+                "throughput_rps": round(len(latencies) / wall_seconds, 2),
+            }
+        return report
+
+
+def run_planner(app, planner, store_ids, rounds, edits, seed, stats):
+    """
+    单个计划员依次处理负责的门店：生成 -> 查看 -> 修改 -> 预估 -> 提交 -> 下载，最后批量下载所有订单
+    """
+    client = app.test_client()
+    rng = random.Random(seed + planner)
+    stats.request(
+        client,
+        "login",
+        "post",
+        "/auth/login",
+        json={"name": f"planner{planner}", "password": PLANNER_PASSWORD},
+    )
+
+    order_ids = []
+    for _ in range(rounds):
+        for store_id in store_ids:
+            stats.request(
+                client,
+                "stores_status",
+                "get",
+                "/IR/optimizations/stores/status",
+            )
+            stats.request(
+                client,
+                "generate",
+                "post",
+                f"/IR/optimizations/store/{store_id}",
+                json={},
+            )
+            body = stats.request(
+                client, "detail", "get", f"/IR/optimizations/store/{store_id}"
+            )
+            if body is None:
+                continue
+            optimization = body["data"]
+            sku_infos = optimization["optimized_sku_info"]
+            # 计划员每次只修改一个 sku
+            for sku_info in rng.sample(sku_infos, min(edits, len(sku_infos))):
+                sku_modify = {
+                    key: sku_info[key]
+                    for key in (
+                        "id",
+                        "sku_id",
+                        "optimized_replenishment",
+                        "store_inventory",
+                    )
+                }
+                sku_modify["modify"] = rng.randint(-3, 10)
+                stats.request(
+                    client,
+                    "modify",
+                    "put",
+                    f"/IR/optimizations/sku-modify/{store_id}",
+                    json={"sku_modify": [sku_modify]},
+                )
+            stats.request(
+                client,
+                "estimate",
+                "get",
+                f"/IR/optimizations/estimate/{store_id}",
+            )
+            stats.request(
+                client, "submit", "get", f"/IR/optimizations/submit/{store_id}"
+            )
+            order_ids.append(optimization["order_id"])
+            stats.request(
+                client,
+                "download",
+                "get",
+                "/IR/optimizations/download",
+                query_string={"order_id": optimization["order_id"], "type": 2},
+            )
+
+    if order_ids:
+        stats.request(
+            client,
+            "download_zip",
+            "get",
+            "/IR/optimizations/download",
+            query_string=[("order_id", order_id) for order_id in order_ids]
+            + [("type", 2)],
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stores", type=int, default=10)
+    parser.add_argument("--skus", type=int, default=2000)
+    parser.add_argument("--planners", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=1, help="每个门店重复完整流程的次数")
+    parser.add_argument("--edits", type=int, default=5, help="每个订单逐个修改的 sku 数量")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--database-uri", help="本地 MySQL 空库 uri，不指定时使用临时 sqlite 文件",
+    )
+    parser.add_argument("--output", help="json 结果文件路径")
+    args = parser.parse_args()
+
+    database_uri = args.database_uri or "sqlite:///{}".format(
+        os.path.join(tempfile.mkdtemp(), "load_test.db")
+    )
+    app = create_load_test_app(database_uri)
+
+    from common import db
+
+    with app.app_context():
+        if database_uri.startswith("sqlite"):
+            prepare_sqlite_schema()
+        db.create_all()
+        start = time.perf_counter()
+        store_ids = seed_data(args.stores, args.skus, args.planners, args.seed)
+        print(
+            "seeded {} stores x {} skus in {:.1f}s".format(
+                args.stores, args.skus, time.perf_counter() - start
+            )
+        )
+
+    stats = LoadStats()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.planners) as executor:
+        futures = [
+            executor.submit(
+                run_planner,
+                app,
+                planner,
+                store_ids[planner :: args.planners],
+                args.rounds,
+                args.edits,
+                args.seed,
+                stats,
+            )
+            for planner in range(args.planners)
+        ]
+        for future in futures:
+            future.result()
+    wall_seconds = time.perf_counter() - start
+
+    report = stats.report(wall_seconds)
+    for name, result in report.items():
+        print(
+            "{:>14}  requests: {requests:>5}  errors: {errors:>3}  p50: {p50_ms:>8.1f}ms  "
+            "p95: {p95_ms:>8.1f}ms  p99: {p99_ms:>8.1f}ms  {throughput_rps:>7.2f} req/s".format(
+                name, **result
+            )
+        )
+    total_requests = sum(result["requests"] for result in report.values())
+    print(
+        "total: {} requests in {:.1f}s, {:.2f} req/s".format(
+            total_requests, wall_seconds, total_requests / wall_seconds
+        )
+    )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "benchmark": "load_test",
+                    "git_commit": get_git_commit(),
+                    "created_at": datetime.datetime.now().isoformat(),
+                    "database": database_uri.split(":")[0],
+                    "options": vars(args),
+                    "wall_seconds": round(wall_seconds, 3),
+                    "endpoints": report,
+                },
+                f,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+# coding: utf-8
+"""
+补货计算接口基准：get_predict_quantity、get_storage_days、get_storage_level、get_expired_goods_info
+在不同 sku 规模下的耗时、吞吐量（sku/s）和内存峰值，结果输出为 json 便于不同提交之间对比
+
+> python -m benchmarks.replenish_benchmark --skus 1000 10000 100000 1000000 --output result.json
+"""
+
+import argparse
+import datetime
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import generators
+from replenish import service as replenish_service
+
+
+def gen_inputs(skus, seed):
+    order_template = generators.gen_order_template(skus, seed)
+    forecast = generators.gen_forecast(skus, seed)
+    hub_inventory = generators.gen_hub_inventory(skus, seed)
+    history_inventory = generators.gen_history_inventory(skus, seed)
+    sku_replenish_quantity = replenish_service.get_predict_quantity(
+        order_template, forecast, hub_inventory
+    )
+    order_info = generators.gen_order_info(
+        order_template, sku_replenish_quantity, seed
+    )
+    return (
+        order_template,
+        forecast,
+        hub_inventory,
+        history_inventory,
+        order_info,
+    )
+
+
+def get_cases(inputs, safety_days):
+    (
+        order_template,
+        forecast,
+        hub_inventory,
+        history_inventory,
+        order_info,
+    ) = inputs
+    return [
+        (
+            "get_predict_quantity",
+            lambda: replenish_service.get_predict_quantity(
+                order_template, forecast, hub_inventory, safety_days
+            ),
+        ),
+        (
+            "get_storage_days",
+            lambda: replenish_service.get_storage_days(
+                order_info, forecast, safety_days
+            ),
+        ),
+        (
+            "get_storage_level",
+            lambda: replenish_service.get_storage_level(order_info, forecast),
+        ),
+        (
+            "get_expired_goods_info",
+            lambda: replenish_service.get_expired_goods_info(
+                order_info, forecast, history_inventory
+            ),
+        ),
+    ]
+
+
+def measure(func, repeat):
+    # 耗时取 repeat 次中的最小值；内存峰值单独运行一次统计，避免 tracemalloc 影响计时
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        seconds.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(seconds), peak
+
+
+def get_git_commit():
+    try:
+        return (
+            subprocess.check_output(
+                ["git", "rev-parse", "--short", "HEAD"],
+                stderr=subprocess.DEVNULL,
+            )
+            .decode()
+            .strip()
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare_reports(base_report_path, report):
+    with open(base_report_path) as f:
+        base_report = json.load(f)
+    base_seconds = {
+        (result["function"], result["skus"]): result["seconds"]
+        for result in base_report["results"]
+    }
+    print(
+        "compare with {}:".format(
+            base_report.get("git_commit") or base_report_path
+        )
+    )
+    for result in report["results"]:
+        key = (result["function"], result["skus"])
+        if key not in base_seconds:
+            continue
+        print(
+            "{:>24}  skus: {:>8}  {:.4f}s -> {:.4f}s  speedup: {:.2f}x".format(
+                result["function"],
+                result["skus"],
+                base_seconds[key],
+                result["seconds"],
+                base_seconds[key] / max(result["seconds"], 1e-9),
+            )
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--skus", type=int, nargs="*", default=[1000, 10000, 100000]
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--safety-days", type=int, default=7)
+    parser.add_argument("--output", help="json 结果文件路径，不指定时只输出到终端")
+    parser.add_argument("--compare", help="之前提交输出的 json 结果文件，对比相同规模的耗时")
+    args = parser.parse_args()
+
+    results = []
+    for skus in args.skus:
+        inputs = gen_inputs(skus, args.seed)
+        for name, func in get_cases(inputs, args.safety_days):
+            seconds, peak = measure(func, args.repeat)
+            result = {
+                "function": name,
+                "skus": skus,
+                "seconds": round(seconds, 6),
+                "skus_per_second": round(skus / max(seconds, 1e-9), 1),
+                "peak_memory_mb": round(peak / 1024 / 1024, 3),
+            }
+            results.append(result)
+            print(
+                "{function:>24}  skus: {skus:>8}  {seconds:.4f}s  "
+                "{skus_per_second:>12.1f} sku/s  peak: {peak_memory_mb:.1f}MB".format(
+                    **result
+                )
+            )
+
+    report = {
+        "benchmark": "replenish",
+        "git_commit": get_git_commit(),
+        "created_at": datetime.datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "safety_days": args.safety_days,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        compare_reports(args.compare, report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# coding: utf-8
+"""
+大表接口返回格式基准：records json、列式 json、Arrow IPC、Parquet 的返回大小和客户端解析耗时
+
+> python -m benchmarks.response_format_benchmark --rows 1000 20000
+"""
+
+import argparse
+import io
+import json
+import time
+
+from benchmarks.json_serializer_benchmark import gen_optimized_sku_df
+from common.arrow_serializers import (
+    ArrowSerializer,
+    ParquetSerializer,
+    is_arrow_available,
+    pa,
+    pq,
+)
+from common.json_serializers import get_json_serializer
+from config import RESPONSE_SUCCESS_CODE, RESPONSE_SUCCESS_MSG
+
+
+def gen_response_data(rows):
+    # 模拟 get_optimization_results 返回结构
+    return {
+        "order_id": "1_20200530001",
+        "status": 1,
+        "optimized_sku_info": gen_optimized_sku_df(rows),
+    }
+
+
+def get_formats():
+    json_serializer = get_json_serializer()
+    formats = [
+        (
+            "records",
+            lambda data: json_serializer.dumps_response(
+                RESPONSE_SUCCESS_CODE, RESPONSE_SUCCESS_MSG, data
+            ).encode(),
+            json.loads,
+        ),
+        (
+            "columnar",
+            lambda data: json_serializer.dumps_response(
+                RESPONSE_SUCCESS_CODE, RESPONSE_SUCCESS_MSG, data, "split"
+            ).encode(),
+            json.loads,
+        ),
+    ]
+    if is_arrow_available():
+        formats.extend(
+            [
+                (
+                    "arrow",
+                    lambda data: ArrowSerializer().dumps_response(
+                        RESPONSE_SUCCESS_CODE, RESPONSE_SUCCESS_MSG, data
+                    ),
+                    lambda body: pa.ipc.open_stream(io.BytesIO(body))
+                    .read_all()
+                    .to_pandas(),
+                ),
+                (
+                    "parquet",
+                    lambda data: ParquetSerializer().dumps_response(
+                        RESPONSE_SUCCESS_CODE, RESPONSE_SUCCESS_MSG, data
+                    ),
+                    lambda body: pq.read_table(io.BytesIO(body)).to_pandas(),
+                ),
+            ]
+        )
+    return formats
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--rows", type=int, nargs="*", default=[1000, 20000, 100000]
+    )
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        data = gen_response_data(rows)
+        for name, dumps, loads in get_formats():
+            start = time.perf_counter()
+            body = dumps(data)
+            dumps_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            loads(body)
+            loads_seconds = time.perf_counter() - start
+            print(
+                "rows: {:>8}  {:>8}: {:>10} bytes  dumps: {:.4f}s  parse: {:.4f}s".format(
+                    rows, name, len(body), dumps_seconds, loads_seconds
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
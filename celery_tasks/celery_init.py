@@ -35,5 +35,10 @@ celery = make_celery(app)
 
 
 celery.autodiscover_tasks(
-    ["celery_tasks.configuration_tasks", "celery_tasks.email_tasks",]
+    [
+        "celery_tasks.configuration_tasks",
+        "celery_tasks.email_tasks",
+        "celery_tasks.forecast_tasks",
+        "celery_tasks.optimization_tasks",
+    ]
 )
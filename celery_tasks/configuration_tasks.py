@@ -1,6 +1,8 @@
 # coding: utf-8
 import os
 
+from celery import chord
+
 from celery_tasks.celery_init import celery, app_config
 
 
@@ -9,24 +11,50 @@ def configuration_save(configuration_settings, user):
     """
     保存配置会触发的异步任务包括：
         保存上传文件到 db 【backend_db, cache_db】---> 跑预测模型
+    每个上传文件对应独立的数据表，以 chord 并行写入：
+        group(每个文件写入 db 子任务) ---> 合并各文件写入结果到缓存 ---> 跑预测模型
     """
+    from applications.IR.configuration.service import ConfigurationService
+    from common.datetime_utils import get_current_datetime
+
     # TODO 默认预测周期为 7天
     predict_week = 7
+    # 初始化保存配置任务，设置配置状态为写入数据库 ing
+    ConfigurationService.init_task(configuration_settings)
+
+    # 所有文件使用同一个更新时间
+    updated_at = get_current_datetime()
+    save_file_tasks = [
+        save_configuration_file_to_db.s(file_name, user, updated_at)
+        for file_name in ConfigurationService.list_upload_files()
+    ]
     # si: signature immutable，不需要将前一个 task 运行结果传给后面的 task 作为首参
-    task_chain = save_configuration_files_to_db.s(
-        configuration_settings, user
-    ) | run_predict_model.si(predict_week)
+    if save_file_tasks:
+        task_chain = chord(
+            save_file_tasks, merge_configuration_file_results.s()
+        ) | run_predict_model.si(predict_week)
+    else:
+        # 没有上传文件时 chord 没有子任务，直接合并空结果
+        task_chain = merge_configuration_file_results.si(
+            []
+        ) | run_predict_model.si(predict_week)
     task_chain()
 
 
 @celery.task()
-def save_configuration_files_to_db(configuration_settings, user):
+def save_configuration_file_to_db(file_name, user, updated_at):
     from applications.IR.configuration.service import ConfigurationService
 
-    # 初始化保存配置任务，设置配置状态为写入数据库 ing
-    ConfigurationService.init_task(configuration_settings)
-    # 保存上传配置文件到后端数据库，更新中配置状态
-    ConfigurationService.save_file_data_to_db(user)
+    # 写入单个上传文件到后端数据库，返回该文件的写入结果
+    return ConfigurationService.save_file_to_db(file_name, user, updated_at)
+
+
+@celery.task()
+def merge_configuration_file_results(file_results):
+    from applications.IR.configuration.service import ConfigurationService
+
+    # 合并所有文件写入结果，更新配置状态
+    return ConfigurationService.merge_file_results(file_results)
 
 
 @celery.task(bind=True)
@@ -0,0 +1,14 @@
+# coding: utf-8
+from celery_tasks.celery_init import celery
+
+
+@celery.task()
+def cache_forecast_results(version, previous_version=None):
+    """
+    预测成功后，预先计算并缓存新版本各门店的预测结果，同时清除上一版本缓存
+    """
+    from applications.IR.forecast.service import ForecastCacheService
+
+    ForecastCacheService.build(version)
+    if previous_version and previous_version != version:
+        ForecastCacheService.invalidate(previous_version)
@@ -0,0 +1,14 @@
+# coding: utf-8
+from celery_tasks.celery_init import celery
+
+
+@celery.task()
+def gen_stores_optimizations(store_ids=None, safety_days=None):
+    """
+    批量生成多门店（默认全部门店）初始化优化结果
+    """
+    from applications.IR.optimization.service import BatchOptimizationService
+
+    BatchOptimizationService(
+        store_ids=store_ids, safety_days=safety_days
+    ).gen_init_optimizations()
@@ -1,4 +1,5 @@
 # coding: utf-8
+import logging
 import pandas as pd
 import json
 from datetime import datetime
@@ -8,12 +9,17 @@ from flask_marshmallow import Marshmallow
 from flask_login import LoginManager
 from flask_sqlalchemy import SQLAlchemy, inspect
 from redis import StrictRedis
+from sqlalchemy.dialects import mysql
 from json.decoder import JSONDecodeError
 
 from config import app_config
 
+logger = logging.getLogger(__name__)
+
 EXCEL_FILE_SUFFIX = ".xlsx"
 CSV_FILE_SUFFIX = ".csv"
+# create_or_update 批量 upsert 每批写入的行数
+UPSERT_BATCH_SIZE = 2000
 
 
 db = SQLAlchemy()
@@ -42,50 +48,171 @@ class DBBase:
     """
 
     @classmethod
-    def create(cls, data):
+    def create(cls, data, commit=True):
+        """
+        commit=False 时只写入当前 session，由调用方统一提交事务
+        """
         try:
             if isinstance(data, pd.DataFrame):
                 data = data.to_dict("record")
             objects = [cls(**row) for row in data]
             db.session.bulk_save_objects(objects)
-            db.session.commit()
+            if commit:
+                db.session.commit()
         except Exception:
             db.session.rollback()
             raise
 
     @classmethod
-    def create_or_update(cls, df):
+    def bulk_insert(cls, data, commit=True):
+        """
+        Core 层 executemany 批量插入，不创建 ORM 对象，适用于大批量数据写入。
+        dataframe 中的 NaN 写入为 NULL
+        """
+        try:
+            if isinstance(data, pd.DataFrame):
+                data = DBBase.convert_df_to_records(data)
+            if data:
+                db.session.execute(cls.__table__.insert(), data)
+            if commit:
+                db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+    @classmethod
+    def create_or_update(cls, df, batch_size=UPSERT_BATCH_SIZE):
         """
         以主键为参考值，决定 dataframe 数据:
             如果已经在表中存在，则进行更新操作;
             若不存在，则新增数据
+        MySQL 使用 INSERT ... ON DUPLICATE KEY UPDATE，SQLite 使用 INSERT ... ON CONFLICT DO UPDATE，
+        按 batch_size 分批 executemany 写入，不需要预先查询全表主键；
+        其他数据库按批查询已存在的主键再分别更新、新增
         """
-        primary_key = inspect(cls).primary_key[0].name
-        primary_values = list(
-            chain(*db.session.query(getattr(cls, primary_key)).all())
-        )
+        primary_keys = [column.name for column in inspect(cls).primary_key]
+        # 只写入表中存在的列；更新时不修改 created_at，updated_at 显式写入（upsert 不会触发 onupdate）
+        columns = [
+            column
+            for column in df.columns
+            if column in cls.__table__.c
+            and column not in ("created_at", "updated_at")
+        ] + ["created_at", "updated_at"]
+        upsert_stmt = cls._get_upsert_statement(columns, primary_keys)
+        if upsert_stmt is None:
+            return cls._create_or_update_by_primary_key(df, batch_size)
+
+        now = datetime.now()
+        try:
+            for start in range(0, len(df), batch_size):
+                batch_df = df.iloc[start : start + batch_size].assign(
+                    created_at=now, updated_at=now
+                )
+                db.session.execute(
+                    upsert_stmt,
+                    DBBase.convert_df_to_records(batch_df[columns]),
+                )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+    @classmethod
+    def _get_upsert_statement(cls, columns, primary_keys):
+        """
+        根据当前数据库类型构造 upsert 语句，不支持的数据库返回 None。
+        冲突时更新除主键、created_at 之外的列
+        """
+        update_columns = [
+            column
+            for column in columns
+            if column not in primary_keys and column != "created_at"
+        ]
+        dialect = db.engine.dialect
+        if dialect.name == "mysql":
+            insert_stmt = mysql.insert(cls.__table__)
+            return insert_stmt.on_duplicate_key_update(
+                {
+                    column: insert_stmt.inserted[column]
+                    for column in update_columns
+                }
+            )
+        if dialect.name == "sqlite":
+            # SQLAlchemy 1.3 的 sqlite 方言没有 on_conflict_do_update，
+            # 以 text 拼接 ON CONFLICT 子句（需 SQLite >= 3.24），列名以方言规则转义，
+            # 参数绑定列类型，DateTime 等按列类型转换
+            quote = dialect.identifier_preparer.quote
+            upsert_stmt = db.text(
+                "INSERT INTO {table} ({columns}) VALUES ({values}) "
+                "ON CONFLICT ({primary_keys}) DO UPDATE SET {updates}".format(
+                    table=dialect.identifier_preparer.format_table(
+                        cls.__table__
+                    ),
+                    columns=", ".join(quote(column) for column in columns),
+                    values=", ".join(":" + column for column in columns),
+                    primary_keys=", ".join(
+                        quote(column) for column in primary_keys
+                    ),
+                    updates=", ".join(
+                        "{0} = excluded.{0}".format(quote(column))
+                        for column in update_columns
+                    ),
+                )
+            )
+            return upsert_stmt.bindparams(
+                *[
+                    db.bindparam(column, type_=cls.__table__.c[column].type)
+                    for column in columns
+                ]
+            )
+        return None
 
-        cls.update(df[df[primary_key].isin(primary_values)])
-        cls.create(df[~df[primary_key].isin(primary_values)])
+    @classmethod
+    def _create_or_update_by_primary_key(cls, df, batch_size):
+        # 每批只查询本批数据中已存在的主键，整体一次提交
+        primary_key = inspect(cls).primary_key[0].name
+        try:
+            for start in range(0, len(df), batch_size):
+                batch_df = df.iloc[start : start + batch_size]
+                primary_values = list(
+                    chain(
+                        *db.session.query(getattr(cls, primary_key))
+                        .filter(
+                            getattr(cls, primary_key).in_(
+                                batch_df[primary_key].tolist()
+                            )
+                        )
+                        .all()
+                    )
+                )
+                exists = batch_df[primary_key].isin(primary_values)
+                cls.update(batch_df[exists], commit=False)
+                cls.create(batch_df[~exists], commit=False)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
 
     @classmethod
-    def delete(cls, filter_spec):
+    def delete(cls, filter_spec, commit=True):
         try:
             db.session.query(cls).filter(
                 *DBBase.format_filter_spec(filter_spec)
             ).delete(synchronize_session=False)
-            db.session.commit()
+            if commit:
+                db.session.commit()
         except Exception:
             db.session.rollback()
             raise
 
     @classmethod
-    def update(cls, data):
+    def update(cls, data, commit=True):
         try:
             if isinstance(data, pd.DataFrame):
                 data = data.to_dict("record")
             db.session.bulk_update_mappings(cls, data)
-            db.session.commit()
+            if commit:
+                db.session.commit()
         except Exception:
             db.session.rollback()
             raise
@@ -97,8 +224,11 @@ class DBBase:
         aggregated_args=[],  # 查询聚合结果列，如 sum，max 等
         filter_spec=None,  # 查询过滤条件(包含 join model)
         join_ons=None,  # Join 表的 set 合集
-        order_keys=None,  # 排序 key
+        order_keys=None,  # 排序 key, list/tuple 为多级排序
         df=False,  # 是否需要将结果直接转换为 dataframe
+        limit=None,  # 分页查询返回的最大行数
+        offset=None,  # 分页查询跳过的行数
+        for_update=False,  # 是否 SELECT ... FOR UPDATE 锁定查询的行直到事务结束
     ):
 
         # 组合所有参数部分
@@ -123,17 +253,27 @@ class DBBase:
             query = query.group_by(*query_args)
 
         # 查询结果排序
-        # TODO 多级排序优化
-        if order_keys is not None:
+        if isinstance(order_keys, (list, tuple)):
+            query = query.order_by(*order_keys)
+        elif order_keys is not None:
             query = query.order_by(order_keys)
 
-        # JUST FOR DEBUG 开发环境输出实际执行的 sql 语句
-        if app_config.DEBUG:
+        # 数据库端分页
+        if limit is not None:
+            query = query.limit(limit)
+        if offset:
+            query = query.offset(offset)
+
+        if for_update:
+            query = query.with_for_update()
+
+        # JUST FOR DEBUG 开发环境输出实际执行的 sql 语句，请求的查询次数、耗时统计见 common.query_stats
+        if logger.isEnabledFor(logging.DEBUG):
             try:
                 q = query.statement
-                print(q.compile(compile_kwargs={"literal_binds": True}))
+                logger.debug(q.compile(compile_kwargs={"literal_binds": True}))
             except NotImplementedError:
-                print(str(query))
+                logger.debug(str(query))
 
         if df:
             return DBBase.convert_query_to_df(query)
@@ -165,6 +305,11 @@ class DBBase:
                     spec.append(key == value)
         return spec
 
+    @staticmethod
+    def convert_df_to_records(df):
+        # dataframe 转换为 Core 层写入的 list[dict]，NaN 转换为 None 写入为 NULL
+        return df.astype(object).where(pd.notnull(df), None).to_dict("record")
+
     @staticmethod
     def convert_query_to_df(_query):
         # columns 将查询的结果根据 args 直接转换为 dataframe 的列名
@@ -0,0 +1,78 @@
+# coding: utf-8
+"""
+大表数据接口的二进制返回格式：Apache Arrow IPC stream / Parquet（pyarrow 为可选依赖）
+返回数据中的 dataframe 作为表数据，返回结构中其余信息 json 序列化后写入表 schema metadata:
+    {"code": 200, "message": "Success.", "data": 除 dataframe 之外的数据, "table": dataframe 在 data 中的 key}
+"""
+import pandas as pd
+
+from common.json_serializers import get_json_serializer
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+
+# schema metadata 中返回结构信息的 key
+ARROW_RESPONSE_METADATA_KEY = b"response"
+
+
+class ArrowSerializer:
+    """
+    Arrow IPC stream 序列化
+    """
+
+    name = "arrow"
+
+    @staticmethod
+    def split_dataframe(data):
+        """
+        从返回数据中取出表数据：data 本身为 dataframe，或 dict 中第一个 dataframe value
+        return: (dataframe, 其余数据, dataframe 在 data 中的 key)，没有 dataframe 时为空表
+        """
+        if isinstance(data, pd.DataFrame):
+            return data, None, None
+        if isinstance(data, dict):
+            for key, value in data.items():
+                if isinstance(value, pd.DataFrame):
+                    rest = {k: v for k, v in data.items() if k != key}
+                    return value, rest, key
+        return pd.DataFrame(), data, None
+
+    def to_table(self, code, message, data):
+        df, rest, table_key = self.split_dataframe(data)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        response = get_json_serializer().dumps(
+            {"code": code, "message": message, "data": rest, "table": table_key}
+        )
+        metadata = dict(table.schema.metadata or {})
+        metadata[ARROW_RESPONSE_METADATA_KEY] = response.encode()
+        return table.replace_schema_metadata(metadata)
+
+    def dumps_response(self, code, message, data):
+        table = self.to_table(code, message, data)
+        sink = pa.BufferOutputStream()
+        writer = pa.ipc.new_stream(sink, table.schema)
+        writer.write_table(table)
+        writer.close()
+        return sink.getvalue().to_pybytes()
+
+
+class ParquetSerializer(ArrowSerializer):
+    """
+    Parquet 序列化，压缩率更高，适合下载或缓存大表数据
+    """
+
+    name = "parquet"
+
+    def dumps_response(self, code, message, data):
+        table = self.to_table(code, message, data)
+        sink = pa.BufferOutputStream()
+        pq.write_table(table, sink)
+        return sink.getvalue().to_pybytes()
+
+
+def is_arrow_available():
+    return pa is not None
@@ -1,4 +1,5 @@
 # coding: utf-8
+import csv
 import os
 
 import pandas as pd
@@ -29,6 +30,23 @@ class FileOperation(FileValidations):
             _df = pd.read_csv(_file)
         return _df
 
+    @staticmethod
+    def read_csv_chunks(file_path, chunk_size):
+        """
+        分块读取 csv 文件，返回每次 chunk_size 行的 dataframe 迭代器，避免大文件一次性读入内存
+        """
+        return pd.read_csv(file_path, chunksize=chunk_size)
+
+    @staticmethod
+    def count_csv_rows(file_path):
+        """
+        统计 csv 文件数据行数（不含表头），用于展示写入进度。
+        以 csv reader 解析，引号内含换行的字段只计为一行；与 pd.read_csv 一致，不统计空行
+        """
+        with open(file_path, newline="", encoding="utf-8") as f:
+            rows = sum(1 for row in csv.reader(f) if row)
+        return max(rows - 1, 0)
+
     @staticmethod
     def get_file_suffix(_file_path):
         return os.path.splitext(_file_path)[-1]
@@ -0,0 +1,185 @@
+# coding: utf-8
+"""
+接口响应 json 序列化：
+    - service 接口返回的 dataframe 直接通过 DataFrame.to_json 列式序列化，不生成中间的 record dict list
+    - 其他数据优先使用 orjson（可选依赖，未安装时使用标准库 json）
+dataframe 和 orjson 序列化中 NaN 为 null，datetime/date 序列化为 ISO 格式字符串
+"""
+import datetime
+import json
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(obj):
+    # 标准库 json 不支持的类型
+    if isinstance(obj, (datetime.datetime, datetime.date)):
+        return obj.isoformat()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, pd.DataFrame):
+        return obj.to_dict("record")
+    raise TypeError(f"{type(obj).__name__} is not JSON serializable")
+
+
+ISO_DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+
+def format_datetime_columns(df):
+    """
+    datetime 列转换为 isoformat 字符串，NaT 为 null，没有 datetime 列时直接返回原 dataframe
+    """
+    datetime_columns = [
+        column
+        for column, dtype in df.dtypes.items()
+        if dtype.kind == "M" or _is_datetime_object_column(df[column])
+    ]
+    if not datetime_columns:
+        return df
+
+    df = df.copy()
+    for column in datetime_columns:
+        series = df[column]
+        if _is_naive_datetime64(series):
+            df[column] = _format_datetime64(series)
+        else:
+            # object 列、带时区列逐个值 isoformat
+            df[column] = [
+                None if pd.isnull(value) else value.isoformat()
+                for value in series.tolist()
+            ]
+    return df
+
+
+def _is_naive_datetime64(series):
+    return series.dtype.kind == "M" and getattr(series.dt, "tz", None) is None
+
+
+def _format_datetime64(series):
+    """
+    datetime64 列向量化格式化，与 isoformat 一致：微秒不为 0 时才输出微秒
+    """
+    formatted = series.dt.strftime(ISO_DATETIME_FORMAT)
+    has_microsecond = series.dt.microsecond != 0
+    if has_microsecond.any():
+        formatted = formatted.where(
+            ~has_microsecond, series.dt.strftime(ISO_DATETIME_FORMAT + ".%f"),
+        )
+    return formatted.where(series.notna(), None)
+
+
+def _is_datetime_object_column(series):
+    # object 列（eg. 数据库 Date 列）以第一个非空值判断是否为 datetime/date
+    if series.dtype.kind != "O":
+        return False
+    valid = series.notnull().values
+    return bool(valid.any()) and isinstance(
+        series.values[valid.argmax()], (datetime.datetime, datetime.date)
+    )
+
+
+def has_dataframe(data):
+    # data 本身为 dataframe，或 dict 的 value 中有 dataframe
+    if isinstance(data, dict):
+        return any(isinstance(value, pd.DataFrame) for value in data.values())
+    return isinstance(data, pd.DataFrame)
+
+
+class JSONSerializer:
+    """
+    标准库 json 序列化
+    """
+
+    name = "json"
+
+    def dumps(self, data, **settings):
+        return json.dumps(data, default=_default, **settings)
+
+    @staticmethod
+    def dumps_df(df, orient="records"):
+        """
+        to_json 默认只保留 10 位有效数字，使用最大精度 15 位；
+        datetime 列预先格式化为与 isoformat 相同的字符串（to_json 的 iso 格式会加上 "Z" 时区后缀）
+        """
+        df = format_datetime_columns(df)
+        if orient == "split":
+            # 列式结构 {"columns": [...], "data": [[...]]}，不输出 index
+            return df.to_json(
+                orient="split",
+                index=False,
+                date_format="iso",
+                double_precision=15,
+            )
+        return df.to_json(orient=orient, date_format="iso", double_precision=15)
+
+    def dumps_data(self, data, orient="records"):
+        """
+        data 为 dataframe，或 value 中有 dataframe 的 dict（eg. 优化结果的 sku 明细）时，
+        dataframe 部分直接写入列式序列化结果
+        """
+        if isinstance(data, pd.DataFrame):
+            return self.dumps_df(data, orient)
+        if has_dataframe(data):
+            return "{{{}}}".format(
+                ", ".join(
+                    f"{self.dumps(key)}: {self.dumps_data(value, orient)}"
+                    for key, value in data.items()
+                )
+            )
+        return self.dumps(data)
+
+    def dumps_response(self, code, message, data, orient="records", **settings):
+        """
+        拼接接口返回结构 {"code": code, "message": message, "data": data}
+        params:
+            orient      dataframe 序列化格式，records: [{column: value}]，split: {"columns": [...], "data": [[...]]}
+        """
+        if not has_dataframe(data):
+            return self.dumps(
+                {"code": code, "message": message, "data": data}, **settings
+            )
+        return '{{"code": {}, "message": {}, "data": {}}}'.format(
+            self.dumps(code), self.dumps(message), self.dumps_data(data, orient)
+        )
+
+
+class OrjsonSerializer(JSONSerializer):
+    """
+    orjson 序列化，原生支持 datetime、numpy 类型，NaN 输出为 null；
+    只支持 2 空格缩进，settings 中 indent 不为空时使用 OPT_INDENT_2
+    """
+
+    name = "orjson"
+
+    def dumps(self, data, **settings):
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if settings.get("indent"):
+            option |= orjson.OPT_INDENT_2
+        if settings.get("sort_keys"):
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(data, default=_default, option=option).decode()
+
+
+JSON_SERIALIZERS = {
+    JSONSerializer.name: JSONSerializer,
+    OrjsonSerializer.name: OrjsonSerializer,
+}
+
+
+def get_json_serializer(name=None):
+    """
+    根据名称获取 serializer，默认 orjson，orjson 未安装时使用标准库 json
+    """
+    name = name or OrjsonSerializer.name
+    if name == OrjsonSerializer.name and orjson is None:
+        name = JSONSerializer.name
+    return JSON_SERIALIZERS[name]()
@@ -0,0 +1,144 @@
+# coding: utf-8
+"""
+按请求的性能分析：请求头 X-Profile-Token（或 query 参数 _profile）与配置的 PROFILE_TOKEN 相同时，
+以 cProfile 记录该请求的函数耗时，同时在后台线程定时采样请求线程的调用栈，
+在 PROFILE_DIR 下保存
+    - {profile_id}.pstats: python -m pstats / snakeviz 查看
+    - {profile_id}.collapsed: flamegraph.pl / speedscope 生成火焰图
+并以响应头 X-Profile-Id 返回 profile_id。
+PROFILE_TOKEN 只告知管理员，未配置时不开启，可在测试环境中直接分析慢接口而无需重新部署
+"""
+import cProfile
+import hmac
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+
+from flask import g, request
+
+from config import BASEDIR, app_config
+
+logger = logging.getLogger(__name__)
+
+PROFILE_TOKEN_HEADER = "X-Profile-Token"
+PROFILE_TOKEN_ARG = "_profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    filename = code.co_filename
+    if filename.startswith(BASEDIR):
+        filename = os.path.relpath(filename, BASEDIR)
+    return f"{filename}:{code.co_name}"
+
+
+class StackSampler(threading.Thread):
+    """
+    每隔 interval 秒采样一次指定线程的调用栈，按 collapsed stack 格式（根 -> 叶以 ; 连接）计数
+    """
+
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+class RequestProfiler:
+    def __init__(self):
+        self.profile_id = "{}_{}".format(
+            datetime.now().strftime("%Y%m%d%H%M%S"), uuid.uuid4().hex[:8]
+        )
+        self.profile = cProfile.Profile()
+        self.sampler = StackSampler(
+            threading.get_ident(), app_config.PROFILE_SAMPLE_INTERVAL
+        )
+        self.start_time = None
+        self.seconds = None
+
+    def start(self):
+        self.start_time = time.perf_counter()
+        self.sampler.start()
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+        self.sampler.stop()
+        self.seconds = time.perf_counter() - self.start_time
+
+    def save(self, profile_dir):
+        os.makedirs(profile_dir, exist_ok=True)
+        path = os.path.join(profile_dir, self.profile_id)
+        self.profile.dump_stats(f"{path}.pstats")
+        with open(f"{path}.collapsed", "w") as f:
+            for stack, count in self.sampler.stacks.items():
+                f.write(f"{stack} {count}\n")
+        return path
+
+
+def is_profile_requested():
+    if not app_config.PROFILE_TOKEN:
+        return False
+    token = request.headers.get(PROFILE_TOKEN_HEADER) or request.args.get(
+        PROFILE_TOKEN_ARG
+    )
+    return bool(token) and hmac.compare_digest(token, app_config.PROFILE_TOKEN)
+
+
+def init_profiler(app):
+    """
+    注册按请求的性能分析，未配置 PROFILE_TOKEN 时只增加一次配置判断
+    """
+
+    @app.before_request
+    def start_profiler():
+        if is_profile_requested():
+            g.profiler = RequestProfiler()
+            g.profiler.start()
+
+    @app.after_request
+    def save_profile(response):
+        profiler = g.pop("profiler", None)
+        if profiler is None:
+            return response
+
+        profiler.stop()
+        path = profiler.save(app_config.PROFILE_DIR)
+        response.headers[PROFILE_ID_HEADER] = profiler.profile_id
+        logger.info(
+            "profile %s: %s %s %.1fms -> %s",
+            profiler.profile_id,
+            request.method,
+            request.path,
+            profiler.seconds * 1000,
+            path,
+        )
+        return response
+
+    @app.teardown_request
+    def stop_profiler(exception=None):
+        # 未处理的异常不会执行 after_request，只停止采样，不保存结果
+        profiler = g.pop("profiler", None)
+        if profiler is not None:
+            profiler.stop()
@@ -0,0 +1,130 @@
+# coding: utf-8
+"""
+请求维度的数据库查询统计：通过 SQLAlchemy before/after_cursor_execute 事件记录
+每个请求的查询次数、数据库总耗时、返回行数和最慢的几条 sql，用于排查 service 中的 N+1 查询。
+    - 开发环境（DEBUG）以响应头返回
+    - 生产环境以 json 结构化日志输出
+"""
+import json
+import logging
+import time
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from config import app_config
+
+logger = logging.getLogger(__name__)
+
+# 每个请求记录的最慢 sql 条数
+QUERY_STATS_SLOWEST_LIMIT = 3
+# 日志中 sql 语句的最大长度
+QUERY_STATS_STATEMENT_MAX_LENGTH = 500
+
+QUERY_STATS_HEADERS = {
+    "count": "X-DB-Query-Count",
+    "total_ms": "X-DB-Time-Ms",
+    "rows": "X-DB-Rows",
+    "slowest_ms": "X-DB-Slowest-Ms",
+}
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.rows = 0
+        # [(耗时, sql)]，按耗时倒序，只保留最慢的 QUERY_STATS_SLOWEST_LIMIT 条
+        self.slowest = []
+
+    def record(self, statement, seconds, rows):
+        self.count += 1
+        self.total_seconds += seconds
+        # 部分 driver 对 select 语句的 rowcount 为 -1
+        self.rows += max(rows, 0)
+        self.slowest.append((seconds, statement))
+        self.slowest.sort(key=lambda item: item[0], reverse=True)
+        del self.slowest[QUERY_STATS_SLOWEST_LIMIT:]
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "total_ms": round(self.total_seconds * 1000, 2),
+            "rows": self.rows,
+            "slowest_ms": round(self.slowest[0][0] * 1000, 2)
+            if self.slowest
+            else 0,
+        }
+
+
+def get_query_stats():
+    # 只统计请求中的查询，celery 任务、命令行中不记录
+    if has_request_context():
+        return g.get("query_stats")
+    return None
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+):
+    seconds = time.perf_counter() - conn.info["query_start_time"].pop()
+    query_stats = get_query_stats()
+    if query_stats is not None:
+        query_stats.record(statement, seconds, cursor.rowcount)
+
+
+def init_query_stats(app):
+    """
+    注册请求查询统计，并配置 common 模块日志级别：
+    开发环境 DEBUG 输出 model_query 执行的 sql，生产环境 INFO 输出查询统计日志
+    """
+    logging.basicConfig(
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+    )
+    logging.getLogger("common").setLevel(
+        logging.DEBUG if app_config.DEBUG else logging.INFO
+    )
+
+    @app.before_request
+    def start_query_stats():
+        g.query_stats = QueryStats()
+
+    @app.after_request
+    def report_query_stats(response):
+        query_stats = get_query_stats()
+        if query_stats is None:
+            return response
+
+        stats = query_stats.to_dict()
+        if app_config.DEBUG:
+            for key, header in QUERY_STATS_HEADERS.items():
+                response.headers[header] = str(stats[key])
+        else:
+            stats.update(
+                {
+                    "method": request.method,
+                    "path": request.path,
+                    "endpoint": request.endpoint,
+                    "status": response.status_code,
+                    "slowest": [
+                        {
+                            "ms": round(seconds * 1000, 2),
+                            "statement": statement[
+                                :QUERY_STATS_STATEMENT_MAX_LENGTH
+                            ],
+                        }
+                        for seconds, statement in query_stats.slowest
+                    ],
+                }
+            )
+            logger.info(json.dumps(stats, ensure_ascii=False))
+        return response
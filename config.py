@@ -1,4 +1,5 @@
 import os
+import tempfile
 from urllib import parse
 from collections import OrderedDict
 
@@ -25,6 +26,15 @@ class Config:
         "SECURITY_PASSWORD_SALT", "qtv3qhnGNZ5JwiSmYSiW"
     )
     SESSION_COOKIE_HTTPONLY = False
+    # 接口响应 json 序列化方式：orjson（未安装时使用 json）/ json
+    JSON_SERIALIZER = os.getenv("JSON_SERIALIZER", "orjson")
+    # 按请求性能分析的口令，只告知管理员，为空时不开启，见 common/profiler.py
+    PROFILE_TOKEN = os.getenv("PROFILE_TOKEN")
+    PROFILE_DIR = os.getenv(
+        "PROFILE_DIR", os.path.join(tempfile.gettempdir(), "ir_profiles")
+    )
+    # 调用栈采样间隔（秒）
+    PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", 0.005))
     ROLES = {
         _index + 1: role
         for _index, role in enumerate(ROLES_ABBREVIATION.keys())
@@ -54,6 +64,10 @@ RESPONSE_SUCCESS_CODE = 200
 RESPONSE_CREATED_SUCCESS_CODE = 201
 RESPONSE_DELETED_SUCCESS_CODE = 202
 RESPONSE_SUCCESS_MSG = "Success."
+# 大表数据接口可选的紧凑返回格式，通过请求头 Accept 指定，默认为 application/json
+RESPONSE_COLUMNAR_JSON_MIMETYPE = "application/vnd.ir.columnar+json"
+RESPONSE_ARROW_MIMETYPE = "application/vnd.apache.arrow.stream"
+RESPONSE_PARQUET_MIMETYPE = "application/vnd.apache.parquet"
 
 
 SYSTEM_ADMINISTRATOR = {
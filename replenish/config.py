@@ -3,6 +3,9 @@
 # 安全库存天数默认为7天
 SAFETY_DAYS = 7
 
+# 预测销量为负数时，库存天数返回的固定最大天数
+MAX_STORAGE_DAYS = 300
+
 ORDER_TEMPLATE_CONFIG = {
     "type_mapping": {
         "sku_id": str,
@@ -15,7 +18,12 @@ ORDER_TEMPLATE_CONFIG = {
 }
 
 FORECAST_CONFIG = {
-    "type_mapping": {"sku_id": str, "qty_mean": float, "qty_std": float,}
+    "type_mapping": {
+        "sku_id": str,
+        "qty_mean": float,
+        "qty_std": float,
+        "daily_mean": float,
+    }
 }
 
 HUB_INVENTORY_CONFIG = {
@@ -30,10 +38,25 @@ HISTORY_INVENTORY_CONFIG = {
         "amount": float,
     },
     "sku_quality_mapping": {"NA": 0, "正品": 1, "临期": 2, "过期": 3,},
+    # 新鲜度分段阈值，与 sku_quality_mapping 的值按顺序对应：<0, [0, 2/3), [2/3, 1), >=1
+    "freshness_thresholds": [0, 2 / 3, 1],
 }
 
+INVENTORY_COHORT_CONFIG = {"type_mapping": {"sku_id": str, "qty": float}}
+
+# 补货后坏货预测方式：
+#   cohort: 按生产日期分批，以预测需求先进先出逐天消耗模拟（需要门店库存批次数据）
+#   lump: 门店库存与补货合并，以 保质期内预测卖出数量 近似计算
+EXPIRED_GOODS_MODEL = "cohort"
+
 SAFETY_STOCK_MODEL_CONFIG = {
     "repl_days": 7,
     "rep_LT": [(2, 0)],  # LeadTime
     "service_level": 0.98,
 }
+
+# 多门店多进程并行计算配置：max_workers 进程数（None 为 cpu 核数），chunk_size 每个进程任务的门店数
+PARALLEL_RUNNER_CONFIG = {
+    "max_workers": None,
+    "chunk_size": 16,
+}
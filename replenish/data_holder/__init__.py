@@ -1,8 +1,9 @@
 # coding: utf-8
 
 from replenish.data_holder.data_holder import (
-    order_template_holder,
-    forecast_holder,
-    hub_inv_holder,
-    hist_inv_holder,
+    OrderTemplateHolder,
+    ForecastHolder,
+    HubInventoryHolder,
+    HistoryInventoryHolder,
+    InventoryCohortHolder,
 )
@@ -1,44 +1,85 @@
 # coding: utf-8
+import numpy as np
+import pandas as pd
 
 from replenish.config import (
     FORECAST_CONFIG,
     HUB_INVENTORY_CONFIG,
     HISTORY_INVENTORY_CONFIG,
+    INVENTORY_COHORT_CONFIG,
     ORDER_TEMPLATE_CONFIG,
 )
 
 
 class BaseDataHolder:
+    """
+    除原始 dataframe 外，load 时同时构建以 sku_id 为索引的列存储 (pandas.Index + numpy 数组)，
+    按 sku 取值都通过列存储向量化查询，不再逐行遍历或每次复制 dataframe
+    """
+
     def __init__(self, config):
         self._data = None
         self._config = config
+        self._sku_index = None
+        self._columns = {}
 
     @property
     def data(self):
         return self._data.copy()
 
     def load_and_process(self, data, *args, **kwargs):
+        data = self.astype(data)
+        self._data = self.process(data, *args, **kwargs)
+        self._build_columns(self._data)
+
+    def astype(self, data):
         # dataframe 的columns 类型转换
         type_map = {}
         for col_name, dtype in self._config["type_mapping"].items():
             if col_name in data.columns:
                 type_map[col_name] = dtype
-        data = data.astype(type_map)
-        self._data = self.process(data, *args, **kwargs)
+        return data.astype(type_map)
 
     def process(self, data, *args, **kwargs):
         return data
 
+    def _build_columns(self, data):
+        """
+        同一 sku 多行时保留最后一行，与逐行构建 {sku_id: value} dict 的覆盖结果一致
+        """
+        if not isinstance(data, pd.DataFrame) or "sku_id" not in data.columns:
+            return
+        data = data.drop_duplicates("sku_id", keep="last")
+        self._sku_index = pd.Index(data["sku_id"].values)
+        self._columns = {col: data[col].values for col in data.columns}
+
+    @property
+    def sku_index(self):
+        return self._sku_index
+
+    def column(self, name):
+        # 与 sku_index 对齐的列数组
+        return self._columns[name]
+
+    def lookup(self, name, sku_ids, fill_value=0.0):
+        """
+        按 sku_ids 顺序取出某列的值，不存在的 sku 补 fill_value
+        """
+        positions = self._sku_index.get_indexer(sku_ids)
+        values = self._columns[name]
+        if not len(values):
+            return np.full(len(positions), fill_value)
+        return np.where(positions >= 0, values.take(positions), fill_value)
+
     @property
     def sku_list(self):
         return list(self._data.sku_id)
 
     @property
     def store_sku_inv(self):
-        sku_inv_dic = {}
-        for i, row in self._data.iterrows():
-            sku_inv_dic[row.sku_id] = row.store_inventory
-        return sku_inv_dic
+        return dict(
+            zip(self._sku_index, self._columns["store_inventory"].tolist())
+        )
 
 
 class OrderTemplateHolder(BaseDataHolder):
@@ -58,14 +99,24 @@ class ForecastHolder(BaseDataHolder):
         """
         获取预测销量的均值标准差
         """
-        data = self.data
-        forecast_dict = dict()
-        for i, row in data.iterrows():
-            forecast_dict[row.sku_id] = [
-                self._mean_std(row.qty_mean, params),
-                self._mean_std(row.qty_std, params),
-            ]
-        return forecast_dict
+        forecast_mean, forecast_std = self.forecast_mean_std(params)
+        return {
+            sku_id: [mean, std]
+            for sku_id, mean, std in zip(
+                self._sku_index, forecast_mean.tolist(), forecast_std.tolist()
+            )
+        }
+
+    def forecast_mean_std(self, params, sku_ids=None):
+        """
+        预测销量的均值、标准差数组，sku_ids 为 None 时与 sku_index 对齐
+        """
+        if sku_ids is None:
+            qty_mean, qty_std = self.column("qty_mean"), self.column("qty_std")
+        else:
+            qty_mean = self.lookup("qty_mean", sku_ids)
+            qty_std = self.lookup("qty_std", sku_ids)
+        return self._mean_std(qty_mean, params), self._mean_std(qty_std, params)
 
     @staticmethod
     def _mean_std(data, params):
@@ -73,58 +124,87 @@ class ForecastHolder(BaseDataHolder):
         return data / params["repl_days"] * params["safety_days"]
 
     def get_daily_forecast(self):
+        return dict(zip(self._sku_index, self.daily_forecast().tolist()))
+
+    def daily_forecast(self, sku_ids=None):
+        """
+        每天预测卖出数量数组，sku_ids 为 None 时与 sku_index 对齐，不在预测中的 sku 为 0
+        """
+        # 预测结果缓存中已预先计算每天预测均值
+        if "daily_mean" in self._columns:
+            if sku_ids is None:
+                return self.column("daily_mean")
+            return self.lookup("daily_mean", sku_ids)
+
         # TODO 第一版 以预测均值 / 7 得出每天预测的平均数量
-        data = self.data
-        daily_forecast_mean = {}
-        for _, row in data.iterrows():
-            # 预测值为负，当做 0 处理
-            daily_forecast_mean[row.sku_id] = (
-                row.qty_mean / 7 if row.qty_mean > 0 else 0
-            )
-        return daily_forecast_mean
+        if sku_ids is None:
+            qty_mean = self.column("qty_mean")
+        else:
+            qty_mean = self.lookup("qty_mean", sku_ids)
+        # 预测值为负，当做 0 处理
+        return np.where(qty_mean > 0, qty_mean / 7, 0)
 
 
 class HubInventoryHolder(BaseDataHolder):
     def __init__(self):
         super().__init__(HUB_INVENTORY_CONFIG)
 
+    @property
+    def data(self):
+        # {sku_id:  qty_sum}
+        return dict(zip(self._sku_index, self._columns["qty"].tolist()))
+
     def process(self, data, *args, **kwargs):
-        # dataframe to dict,  {sku_id:  qty_sum}
-        return data.groupby(["sku_id"])["qty"].sum().to_dict()
+        # 按 sku 汇总仓库库存 dataframe: sku_id, qty
+        return data.groupby("sku_id", as_index=False)["qty"].sum()
 
 
 class HistoryInventoryHolder(BaseDataHolder):
+    """
+    过去四周门店库存，load 时按 week 一次 groupby 汇总每周的新鲜度标记、总金额和过期数量、金额，
+    各周坏货信息都从汇总结果中取，不再每周过滤一次 dataframe
+    """
+
     def __init__(self):
         super().__init__(HISTORY_INVENTORY_CONFIG)
         self.bad_inv = self._config["sku_quality_mapping"].get("过期")
         self.cur_week = None
         self.hist_week = None
-
-    def process(self, data, *args, **kwargs):
-        data = data.sort_values(["week"])
-        weeks = list(data["week"].unique())
-        *self.hist_week, self.cur_week = weeks
-        return data
+        self._week_summary = {}
+
+    def _build_columns(self, data):
+        # 历史库存以 week 而不是 sku 索引
+        expired = data["quality"].values == self.bad_inv
+        summary = (
+            pd.DataFrame(
+                {
+                    "quality": data["quality"].values,
+                    "amount": data["amount"].values,
+                    "expired_qty": np.where(expired, data["qty"].values, 0.0),
+                    "expired_amount": np.where(
+                        expired, data["amount"].values, 0.0
+                    ),
+                }
+            )
+            .groupby(data["week"].values)
+            .sum()
+        )
+        # groupby 结果按 week 升序，最后一周为当前 week
+        *self.hist_week, self.cur_week = summary.index.tolist()
+        self._week_summary = summary.to_dict("index")
 
     def get_hist_expired_info(self):
-        expired_info_dict = {}
-        data = self.data
         if self.hist_week is None:
             return {}
-        for week in self.hist_week:
-            stock_info = data[data["week"] == week]
-            expired_info_dict[week] = self._get_expired_dateil(stock_info)
-        return expired_info_dict
+        return {week: self._get_expired_dateil(week) for week in self.hist_week}
 
     def get_cur_expired_info(self):
-        data = self.data
-        stock_info = data[data["week"] == self.cur_week]
-        expired_info = self._get_expired_dateil(stock_info)
-        return expired_info
+        return self._get_expired_dateil(self.cur_week)
 
-    def _get_expired_dateil(self, stock_data):
+    def _get_expired_dateil(self, week):
+        summary = self._week_summary[week]
         # 当前 week 缺失数据
-        if stock_data.quality.sum() < 1:
+        if summary["quality"] < 1:
             return {
                 k: 0.0
                 for k in [
@@ -134,12 +214,10 @@ class HistoryInventoryHolder(BaseDataHolder):
                     "ratio",
                 ]
             }
-        expired = stock_data[stock_data["quality"] == self.bad_inv]
-        total_amount = stock_data.amount.sum()
-        expired_qty = expired.qty.sum()
-        expired_amount = expired.amount.sum()
+        total_amount = summary["amount"]
+        expired_amount = summary["expired_amount"]
         return {
-            "expired_qty": expired_qty,
+            "expired_qty": summary["expired_qty"],
             "expired_amount": expired_amount,
             "total_amount": total_amount,
             # 防止门店库存为0的情况
@@ -147,7 +225,31 @@ class HistoryInventoryHolder(BaseDataHolder):
         }
 
 
-order_template_holder = OrderTemplateHolder()
-forecast_holder = ForecastHolder()
-hub_inv_holder = HubInventoryHolder()
-hist_inv_holder = HistoryInventoryHolder()
+class InventoryCohortHolder(BaseDataHolder):
+    """
+    门店库存按生产日期分批（cohort）: sku_id, qty, age_days（库存日期 - 生产日期的天数），
+    同一 sku 有多批，列数组不按 sku 去重
+    """
+
+    def __init__(self):
+        super().__init__(INVENTORY_COHORT_CONFIG)
+
+    def process(self, data, *args, **kwargs):
+        data = data[data["qty"] > 0]
+        age_days = (
+            pd.to_datetime(data["date"])
+            - pd.to_datetime(data["production_dte"])
+        ).dt.days
+        # 没有生产日期的库存按新到货处理，与合并近似计算一致；生产日期晚于库存日期按 0 天
+        return pd.DataFrame(
+            {
+                "sku_id": data["sku_id"].values,
+                "qty": data["qty"].values,
+                "age_days": age_days.fillna(0)
+                .clip(lower=0)
+                .values.astype(float),
+            }
+        )
+
+    def _build_columns(self, data):
+        self._columns = {col: data[col].values for col in data.columns}
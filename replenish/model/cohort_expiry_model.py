@@ -0,0 +1,147 @@
+# coding: utf-8
+
+import numpy as np
+import pandas as pd
+
+
+class CohortExpiryModel:
+    """
+    按生产日期分批（cohort）的坏货模拟模型：
+    门店每批库存的剩余保质期 = 保质期 - 库存天数，补货作为剩余保质期为完整保质期的新一批，
+    每天的预测需求先消耗剩余保质期最短的一批（先进先出），到期未卖出的数量即为坏货
+    """
+
+    def run(
+        self,
+        sku_ids,
+        store_inv,
+        replenishment,
+        shelf_life,
+        daily_forecast,
+        cohort_holder,
+    ):
+        """
+        @param sku_ids: array, 订单 sku
+        @param store_inv: array, 与 sku_ids 对齐的门店库存
+        @param replenishment: array, 与 sku_ids 对齐的补货数量
+        @param shelf_life: array, 与 sku_ids 对齐的保质期
+        @param daily_forecast: array, 与 sku_ids 对齐的每天预测卖出数量
+        @param cohort_holder: InventoryCohortHolder, 门店库存批次
+        @return np.ndarray 与 sku_ids 对齐的预测坏货数量
+        """
+        remaining_days, qty = self._build_cohorts(
+            sku_ids, store_inv, replenishment, shelf_life, cohort_holder
+        )
+        return self._simulate_vectorized(remaining_days, qty, daily_forecast)
+
+    @staticmethod
+    def _build_cohorts(
+        sku_ids, store_inv, replenishment, shelf_life, cohort_holder
+    ):
+        """
+        构建 (sku 数, 最多批次数 + 1) 的剩余保质期、数量二维数组，每行按剩余保质期升序，不足的批次数量为 0。
+        最后一列为剩余保质期等于保质期的新批次：补货数量，以及没有批次数据的 sku 的门店库存，
+        库存天数不小于 0，新批次总是最后消耗，只需对门店库存批次排序
+        """
+        shelf_life = np.asarray(shelf_life, dtype=float)
+        sku_count = len(shelf_life)
+        positions = pd.Index(sku_ids).get_indexer(
+            cohort_holder.column("sku_id")
+        )
+        in_order = positions >= 0
+        positions = positions[in_order]
+        cohort_qty = cohort_holder.column("qty")[in_order]
+        cohort_remaining = (
+            shelf_life[positions] - cohort_holder.column("age_days")[in_order]
+        )
+
+        # 按 (sku, 剩余保质期) 组合 key 一次排序（比 np.lexsort 快），计算每批在所属 sku 内的序号
+        remaining_offset = cohort_remaining - cohort_remaining.min(initial=0)
+        order = np.argsort(
+            positions * (remaining_offset.max(initial=0) + 1) + remaining_offset
+        )
+        positions = positions[order]
+        group_start = np.searchsorted(positions, positions, side="left")
+        ranks = np.arange(len(positions)) - group_start
+        cohort_count = ranks.max() + 1 if len(ranks) else 0
+
+        shape = (sku_count, cohort_count + 1)
+        remaining_matrix, qty_matrix = np.zeros(shape), np.zeros(shape)
+        remaining_matrix[positions, ranks] = cohort_remaining[order]
+        qty_matrix[positions, ranks] = cohort_qty[order]
+
+        no_cohort = np.bincount(positions, minlength=sku_count) == 0
+        remaining_matrix[:, -1] = shelf_life
+        qty_matrix[:, -1] = np.asarray(replenishment, dtype=float) + np.where(
+            no_cohort, np.asarray(store_inv, dtype=float), 0.0
+        )
+        return remaining_matrix, qty_matrix
+
+    @staticmethod
+    def _simulate_vectorized(remaining_days, qty, daily_forecast):
+        """
+        向量化模拟所有 sku 的先进先出消耗，只按批次循环：
+        t 为开始消耗当前批次的时间（天），当前批次在剩余保质期内最多卖出 每天预测 * (剩余保质期 - t)，
+        当前批次卖完或到期后才消耗下一批。
+        剩余保质期为整数天时与 _simulate_daily 逐天模拟结果一致，_simulate_daily 保留作为对照实现
+        """
+        daily_forecast = np.asarray(daily_forecast, dtype=float)
+        sku_count, cohort_count = qty.shape
+        start_days = np.zeros(sku_count)
+        expired_qty = np.zeros(sku_count)
+        for cohort in range(cohort_count):
+            cohort_qty = qty[:, cohort]
+            expire_days = np.maximum(remaining_days[:, cohort], 0)
+            sellable = daily_forecast * np.maximum(expire_days - start_days, 0)
+            sold = np.minimum(cohort_qty, sellable)
+            expired_qty += cohort_qty - sold
+
+            # 当前批次卖完（或到期）的时间，预测为 0 时不再有消耗
+            with np.errstate(divide="ignore", invalid="ignore"):
+                sold_out_days = np.where(
+                    daily_forecast > 0,
+                    start_days + cohort_qty / daily_forecast,
+                    np.inf,
+                )
+            start_days = np.maximum(
+                start_days, np.minimum(sold_out_days, expire_days)
+            )
+        return expired_qty
+
+    @staticmethod
+    def _simulate_daily(remaining_days, qty, daily_forecast):
+        """
+        逐 sku 逐天的先进先出模拟：每天先以预测需求从剩余保质期最短的批次开始消耗，
+        当天结束时剩余保质期到 0 的批次计为坏货
+        """
+        expired_qty = np.zeros(len(qty))
+        for sku in range(len(qty)):
+            cohorts = sorted(
+                [
+                    [max(days, 0), amount]
+                    for days, amount in zip(remaining_days[sku], qty[sku])
+                    if amount > 0
+                ]
+            )
+            # 已过期的批次
+            expired_qty[sku] += sum(
+                amount for days, amount in cohorts if days <= 0
+            )
+            cohorts = [cohort for cohort in cohorts if cohort[0] > 0]
+            day = 0
+            while cohorts:
+                day += 1
+                demand = daily_forecast[sku]
+                for cohort in cohorts:
+                    sold = min(cohort[1], demand)
+                    cohort[1] -= sold
+                    demand -= sold
+                expired_qty[sku] += sum(
+                    amount for days, amount in cohorts if days <= day
+                )
+                cohorts = [
+                    cohort
+                    for cohort in cohorts
+                    if cohort[0] > day and cohort[1] > 0
+                ]
+        return expired_qty
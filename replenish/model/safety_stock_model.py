@@ -10,29 +10,60 @@ class SafetyStockModel:
     # 安全库存模型
 
     def __init__(self, safety_days):
-        self.params = SAFETY_STOCK_MODEL_CONFIG
-        self.params["safety_days"] = safety_days
+        # 每次实例化复制一份模型参数，避免多线程/多门店并行计算时互相覆盖
+        self.params = dict(SAFETY_STOCK_MODEL_CONFIG, safety_days=safety_days)
 
     def run(self, order_template_holder, forecast_holder, hub_inv_holder):
         # get sku list
-        order_skus = order_template_holder.sku_list
-        forecast_skus = forecast_holder.sku_list
-        sku_list = set(order_skus) & set(forecast_skus)
+        sku_ids = order_template_holder.sku_index.intersection(
+            forecast_holder.sku_index
+        )
+
+        # 按 sku_ids 对齐门店库存、仓库库存、预测均值标准差数组
+        store_inv = order_template_holder.lookup("store_inventory", sku_ids)
+        hub_inv = hub_inv_holder.lookup("qty", sku_ids)
+        forecast_mean, forecast_std = forecast_holder.forecast_mean_std(
+            self.params, sku_ids
+        )
+
+        repl = self._run_replenish_vectorized(
+            forecast_mean, forecast_std, store_inv, hub_inv, self.params
+        )
+        return dict(zip(sku_ids, repl.tolist()))
 
-        # get store_inv, hub_inv
-        store_inv = order_template_holder.store_sku_inv
-        hub_inv = hub_inv_holder.data
+    @staticmethod
+    def _run_replenish_vectorized(
+        forecast_mean, forecast_std, store_inv, hub_inv, params
+    ):
+        """
+        向量化计算所有 sku 的应补货数量，入参为按 sku 对齐的 numpy 数组
+        计算结果与 _run_replenish 逐 sku 计算一致，_run_replenish 保留作为对照实现
+        """
+        lt_mean, lt_std = params["rep_LT"][0][0], params["rep_LT"][0][1]
+        safety_days = params["safety_days"]
 
-        self.params["store_inv"] = store_inv
-        self.params["hub_inv"] = hub_inv
+        # 计算服务标准差个数
+        sf = scipy.stats.norm.ppf(params["service_level"])
 
-        # forecast mean and std by sku-id
-        forecast_mean_std = forecast_holder.get_forecast_mean_std(self.params)
-        forecast_mean_std = {sku: forecast_mean_std[sku] for sku in sku_list}
+        # 安全库存公式
+        ss = np.sqrt(
+            lt_mean * (forecast_std / safety_days) ** 2
+            + lt_std ** 2 * (forecast_mean / safety_days) ** 2
+        )
+        ss = np.round(sf * ss)
 
-        return self._run_replenish(forecast_mean_std, self.params)
+        res = ss + forecast_mean + forecast_mean * lt_mean / safety_days
 
-    def _run_replenish(self, forecast_data, params):
+        # 应补货数量，见 _get_repl_quantity
+        return np.minimum(np.maximum(res - store_inv, 0), hub_inv)
+
+    def _run_replenish(self, forecast_data, store_inv, hub_inv, params):
+        """
+        逐 sku 计算应补货数量
+        @param forecast_data: dict {sku_id: [forecast_mean, forecast_std]}
+        @param store_inv: dict {sku_id: 门店库存}
+        @param hub_inv: dict {sku_id: 仓库库存}
+        """
         result = {}
         # 提前期均值和方差
         lt_mean, lt_std = params["rep_LT"][0][0], params["rep_LT"][0][1]
@@ -51,8 +82,8 @@ class SafetyStockModel:
             )
             ss = np.round(sf * ss)
 
-            sku_store_inv = params["store_inv"].get(sku, 0)
-            sku_hub_inv = params["hub_inv"].get(sku, 0)
+            sku_store_inv = store_inv.get(sku, 0)
+            sku_hub_inv = hub_inv.get(sku, 0)
             res = (
                 ss
                 + forecast_mean
@@ -0,0 +1,194 @@
+# coding: utf-8
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from replenish import service as replenish_service
+from replenish.config import PARALLEL_RUNNER_CONFIG
+
+
+def pack_store_inputs(order_template, forecast, hub_inventory):
+    """
+    将多门店的 dataframe 按门店拆分为紧凑的 numpy 数组，作为子进程的输入（pickle 体积小，不含 ORM 对象）
+    @param order_template: DataFrame, store_id, sku_id, store_inventory
+    @param forecast: DataFrame, store_id, sku_id, qty_mean, qty_std
+    @param hub_inventory: DataFrame, store_id, sku_id, qty
+    @return list [{"store_id": 1, "sku_id": array, "store_inventory": array, ...}]
+    """
+    forecast_by_store = dict(list(forecast.groupby("store_id")))
+    hub_by_store = dict(list(hub_inventory.groupby("store_id")))
+    empty_forecast, empty_hub = forecast.iloc[:0], hub_inventory.iloc[:0]
+
+    store_inputs = []
+    for store_id, store_df in order_template.groupby("store_id"):
+        store_forecast = forecast_by_store.get(store_id, empty_forecast)
+        store_hub = hub_by_store.get(store_id, empty_hub)
+        store_inputs.append(
+            {
+                "store_id": store_id,
+                "sku_id": _as_str_array(store_df["sku_id"]),
+                "store_inventory": store_df["store_inventory"].values,
+                "forecast_sku_id": _as_str_array(store_forecast["sku_id"]),
+                "qty_mean": store_forecast["qty_mean"].values,
+                "qty_std": store_forecast["qty_std"].values,
+                "hub_sku_id": _as_str_array(store_hub["sku_id"]),
+                "hub_qty": store_hub["qty"].values,
+            }
+        )
+    return store_inputs
+
+
+def _as_str_array(series):
+    # 定长 unicode 数组 pickle 时不需要逐个序列化 python 对象
+    return series.values.astype(str)
+
+
+def run_store(store_input, safety_days):
+    """
+    计算单个门店 sku 的建议补货量、库存周转天数和补货前后库存水平天数
+    @return dict, 与 store_input["sku_id"] 对齐的结果数组
+    """
+    order_info = pd.DataFrame(
+        {
+            "store_id": store_input["store_id"],
+            "sku_id": store_input["sku_id"],
+            "store_inventory": store_input["store_inventory"],
+        }
+    )
+    forecast = pd.DataFrame(
+        {
+            "store_id": store_input["store_id"],
+            "sku_id": store_input["forecast_sku_id"],
+            "qty_mean": store_input["qty_mean"],
+            "qty_std": store_input["qty_std"],
+        }
+    )
+    hub_inventory = pd.DataFrame(
+        {
+            "store_id": store_input["store_id"],
+            "sku_id": store_input["hub_sku_id"],
+            "qty": store_input["hub_qty"],
+        }
+    )
+
+    quantity = replenish_service.get_batch_predict_quantity(
+        order_info, forecast, hub_inventory, safety_days
+    )
+    # 不在预测结果中的 sku 建议补货量为 0
+    order_info["replenishment"] = (
+        order_info[replenish_service.BATCH_KEYS]
+        .merge(quantity, how="left", on=replenish_service.BATCH_KEYS)[
+            "quantity"
+        ]
+        .fillna(0.0)
+        .values
+    )
+    storage_days = replenish_service.get_batch_storage_days(
+        order_info, forecast, safety_days
+    )
+    storage_level = replenish_service.get_batch_storage_level(
+        order_info, forecast
+    )
+    level_before, level_after = storage_level.values[0].tolist()
+
+    return {
+        "store_id": store_input["store_id"],
+        "sku_id": store_input["sku_id"],
+        "replenishment": order_info["replenishment"].values,
+        "storage_days": storage_days,
+        "level_before": level_before,
+        "level_after": level_after,
+    }
+
+
+def _run_store_chunk(store_inputs, safety_days):
+    results = []
+    for store_input in store_inputs:
+        start = time.perf_counter()
+        result = run_store(store_input, safety_days)
+        result["elapsed"] = time.perf_counter() - start
+        results.append(result)
+    return results
+
+
+class ParallelReplenishRunner:
+    """
+    多门店补货计算的多进程并行执行器：
+    门店按 chunk_size 分片提交到 ProcessPoolExecutor，子进程只接收/返回 numpy 数组，
+    执行完成后 timings 记录每个门店的计算耗时（秒）
+    """
+
+    def __init__(self, max_workers=None, chunk_size=None):
+        self.max_workers = max_workers or PARALLEL_RUNNER_CONFIG["max_workers"]
+        self.chunk_size = chunk_size or PARALLEL_RUNNER_CONFIG["chunk_size"]
+        self.timings = {}
+
+    def run(self, store_inputs, safety_days):
+        chunks = [
+            store_inputs[i : i + self.chunk_size]
+            for i in range(0, len(store_inputs), self.chunk_size)
+        ]
+        results = []
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [
+                executor.submit(_run_store_chunk, chunk, safety_days)
+                for chunk in chunks
+            ]
+            for future in futures:
+                for result in future.result():
+                    self.timings[result["store_id"]] = result.pop("elapsed")
+                    results.append(result)
+        return results
+
+    @staticmethod
+    def concat_results(results):
+        """
+        return:
+            order_df: store_id, sku_id, replenishment, storage_days
+            storage_level_df: index 为 store_id（与 get_batch_storage_level 一致）, columns: level_before, level_after
+        没有门店结果时返回相同列、类型的空 DataFrame（np.concatenate 不接受空列表）
+        """
+        if not results:
+            order_df = pd.DataFrame(
+                {
+                    "store_id": np.array([], dtype=int),
+                    "sku_id": np.array([], dtype=str),
+                    "replenishment": np.array([], dtype=float),
+                    "storage_days": np.array([], dtype=int),
+                }
+            )
+            storage_level_df = pd.DataFrame(
+                {
+                    "level_before": np.array([], dtype=float),
+                    "level_after": np.array([], dtype=float),
+                },
+                index=pd.Index([], dtype=int, name="store_id"),
+            )
+            return order_df, storage_level_df
+
+        order_df = pd.DataFrame(
+            {
+                "store_id": np.concatenate(
+                    [
+                        np.repeat(result["store_id"], len(result["sku_id"]))
+                        for result in results
+                    ]
+                ),
+                **{
+                    col: np.concatenate([result[col] for result in results])
+                    for col in ("sku_id", "replenishment", "storage_days")
+                },
+            }
+        )
+        storage_level_df = pd.DataFrame(
+            {
+                col: [result[col] for result in results]
+                for col in ("level_before", "level_after")
+            },
+            index=pd.Index(
+                [result["store_id"] for result in results], name="store_id"
+            ),
+        )
+        return order_df, storage_level_df
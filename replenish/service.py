@@ -1,15 +1,22 @@
 # coding: utf-8
+import numpy as np
+import pandas as pd
 
-from replenish.config import SAFETY_STOCK_MODEL_CONFIG
+from replenish.config import MAX_STORAGE_DAYS, SAFETY_STOCK_MODEL_CONFIG
 from replenish.data_holder import (
-    order_template_holder,
-    forecast_holder,
-    hub_inv_holder,
-    hist_inv_holder,
+    OrderTemplateHolder,
+    ForecastHolder,
+    HubInventoryHolder,
+    HistoryInventoryHolder,
+    InventoryCohortHolder,
 )
+from replenish.model.cohort_expiry_model import CohortExpiryModel
 from replenish.model.safety_stock_model import SafetyStockModel
 from replenish.utils import ensure_float
 
+# 多门店批量计算时的分组 key
+BATCH_KEYS = ["store_id", "sku_id"]
+
 
 def get_predict_quantity(
     order_template, forecast, hub_inventory, safety_days=7
@@ -22,7 +29,10 @@ def get_predict_quantity(
     @param safety_days: int, default=7
     @return dict  {sku_id: quantity}
     """
-    # data preprocess
+    # data preprocess, holder 每次调用单独创建，保证多线程并行计算时数据互不干扰
+    order_template_holder = OrderTemplateHolder()
+    forecast_holder = ForecastHolder()
+    hub_inv_holder = HubInventoryHolder()
     order_template_holder.load_and_process(order_template)
     forecast_holder.load_and_process(forecast)
     hub_inv_holder.load_and_process(hub_inventory)
@@ -46,10 +56,9 @@ def get_storage_days(order_info, forecast, safety_days):
     @return dict {sku_id: days}
     """
 
-    MAX_DAYS = 300
-    params = SAFETY_STOCK_MODEL_CONFIG
-    params["safety_days"] = safety_days
+    params = dict(SAFETY_STOCK_MODEL_CONFIG, safety_days=safety_days)
 
+    forecast_holder = ForecastHolder()
     forecast_holder.load_and_process(forecast)
     forecast_mean_std = forecast_holder.get_forecast_mean_std(params)
 
@@ -58,13 +67,13 @@ def get_storage_days(order_info, forecast, safety_days):
         total_inventory = ensure_float(row["store_inventory"]) + ensure_float(
             row["replenishment"]
         )
-        if row["sku_id"] in forecast_holder.sku_list:
+        if row["sku_id"] in forecast_mean_std:
             daily_forecast = forecast_mean_std[row["sku_id"]][0] / safety_days
             # 如果预测值为负数，返回一个最大天数 300
             days = (
                 int(total_inventory / daily_forecast)
                 if daily_forecast > 0
-                else MAX_DAYS
+                else MAX_STORAGE_DAYS
             )
             return days
         else:
@@ -80,6 +89,7 @@ def get_storage_level(order_info, forecast):
     @param forecast: Dataframe, sku_id, qty_mean, qty_std
     @return storage_level: tuple, (level_before, level_after)
     """
+    forecast_holder = ForecastHolder()
     forecast_holder.load_and_process(forecast)
     daily_forecast = forecast_holder.get_daily_forecast()
 
@@ -97,20 +107,27 @@ def get_storage_level(order_info, forecast):
     return get_level("before"), get_level("after")
 
 
-def get_expired_goods_info(order_info, forecast, hist_inventory):
+def get_expired_goods_info(
+    order_info, forecast, hist_inventory, inventory_cohorts=None
+):
     """
     坏货率计算：计算过去三周的坏货率、补货之后的坏货率
     过去三周坏货率：可以直接根据门店仓库信息计算
     补货之后坏货率：需根据预测卖出的均值计算未来的坏货
-        坏货数量 = 仓库期初库存 + 补货数量 - 保质期内卖出数量，坏货率 = 坏货金额 / 补货后仓库总金额
-    @param order_info: list, [{'sku_id': 1033, 'store_inventory': 3, 'replenishment': 12, "unit_price": 23, "shelf_life": 365}]
+        - 有门店库存批次数据时，以 CohortExpiryModel 按批次先进先出模拟坏货数量
+        - 否则 坏货数量 = 仓库期初库存 + 补货数量 - 保质期内卖出数量
+        坏货率 = 坏货金额 / 补货后仓库总金额
+    补货后坏货按 sku 列数组一次向量化计算
+    @param order_info: list or DataFrame, [{'sku_id': 1033, 'store_inventory': 3, 'replenishment': 12, "unit_price": 23, "shelf_life": 365}]
     @param forecast: Dataframe, sku_id, qty_mean, qty_std
     @param hist_inventory: Dataframe, 过去四周的门店库存数据 columns: week, quality, qty, amount
+    @param inventory_cohorts: Dataframe, 门店当前库存批次 columns: sku_id, qty, date, production_dte
     @return: dict {"week": ["2020-w20"], "data": [{"unit": "金额", "value":500, "minus": 400, "data":[1000, 1100, 100, 500]}]}
     """
+    hist_inv_holder = HistoryInventoryHolder()
+    forecast_holder = ForecastHolder()
     hist_inv_holder.load_and_process(hist_inventory)
     forecast_holder.load_and_process(forecast)
-    daily_forecast = forecast_holder.get_daily_forecast()
 
     # 历史 week 坏货
     expired_info = hist_inv_holder.get_hist_expired_info()
@@ -119,23 +136,40 @@ def get_expired_goods_info(order_info, forecast, hist_inventory):
     cur_expired_info = hist_inv_holder.get_cur_expired_info()
 
     # 补货后坏货
-    for row in order_info:
-        # 根据预测计算 产品保质期内总共卖出的数量
-        inv_forecast_sellout = (
-            daily_forecast.get(row["sku_id"], 0) * row["shelf_life"]
+    order_columns = get_order_columns(
+        order_info,
+        ["store_inventory", "replenishment", "unit_price", "shelf_life"],
+    )
+    daily_forecast = forecast_holder.daily_forecast(order_columns["sku_id"])
+    if inventory_cohorts is not None:
+        cohort_holder = InventoryCohortHolder()
+        cohort_holder.load_and_process(inventory_cohorts)
+        # 预测坏货
+        inv_end = CohortExpiryModel().run(
+            order_columns["sku_id"],
+            order_columns["store_inventory"],
+            order_columns["replenishment"],
+            order_columns["shelf_life"],
+            daily_forecast,
+            cohort_holder,
         )
+    else:
+        # 根据预测计算 产品保质期内总共卖出的数量
+        inv_forecast_sellout = daily_forecast * order_columns["shelf_life"]
         # 预测坏货
-        inv_end = max(
+        inv_end = np.fmax(
             0,
-            row["store_inventory"]
-            + row["replenishment"]
+            order_columns["store_inventory"]
+            + order_columns["replenishment"]
             - inv_forecast_sellout,
         )
-        cur_expired_info["expired_amount"] += inv_end * row["unit_price"]
-        cur_expired_info["expired_qty"] += inv_end
-        cur_expired_info["total_amount"] += (
-            row["replenishment"] * row["unit_price"]
-        )
+    cur_expired_info["expired_amount"] += float(
+        np.sum(inv_end * order_columns["unit_price"])
+    )
+    cur_expired_info["expired_qty"] += float(np.sum(inv_end))
+    cur_expired_info["total_amount"] += float(
+        np.sum(order_columns["replenishment"] * order_columns["unit_price"])
+    )
     # 防止库存为0的情况
     cur_expired_info["ratio"] = (
         cur_expired_info["expired_amount"] / cur_expired_info["total_amount"]
@@ -146,3 +180,151 @@ def get_expired_goods_info(order_info, forecast, hist_inventory):
     return expired_info
     # expired_info 解析为前端需要的格式
     # return parse_expired_info(expired_info)
+
+
+def get_order_columns(order_info, columns):
+    """
+    订单信息转为列数组：columns 中的数值列（float）与 sku_id
+    @param order_info: list or DataFrame, [{'sku_id': 1033, 'store_inventory': 3, ...}]
+    @param columns: list, 数值列名
+    @return dict {column: np.ndarray, "sku_id": array-like}
+    """
+    if isinstance(order_info, pd.DataFrame):
+        order_columns = {
+            column: order_info[column].values.astype(float)
+            for column in columns
+        }
+        order_columns["sku_id"] = order_info["sku_id"].values
+        return order_columns
+
+    order_columns = {
+        column: np.fromiter(
+            (row[column] for row in order_info), float, len(order_info)
+        )
+        for column in columns
+    }
+    order_columns["sku_id"] = [row["sku_id"] for row in order_info]
+    return order_columns
+
+
+def get_batch_predict_quantity(
+    order_template, forecast, hub_inventory, safety_days=7
+):
+    """
+    多门店批量获取sku的建议补货数量，按 (store_id, sku_id) 分组一次向量化计算，
+    每个门店的结果与 get_predict_quantity 单独计算一致
+    @param order_template: DataFrame, store_id, sku_id, store_inventory, ...
+    @param forecast: DataFrame, store_id, sku_id, qty_mean, qty_std
+    @param hub_inventory: DataFrame, store_id, sku_id, qty
+    @param safety_days: int, default=7
+    @return DataFrame store_id, sku_id, quantity
+    """
+    params = dict(SAFETY_STOCK_MODEL_CONFIG, safety_days=safety_days)
+
+    order_template = OrderTemplateHolder().astype(order_template).fillna(0.0)
+    forecast = ForecastHolder().astype(forecast)
+    hub_inventory = HubInventoryHolder().astype(hub_inventory)
+
+    # 同一门店 sku 多行时取最后一行，与单门店逐行构建 dict 的覆盖结果一致
+    store_inv = order_template.drop_duplicates(BATCH_KEYS, keep="last")[
+        BATCH_KEYS + ["store_inventory"]
+    ]
+    forecast = forecast.drop_duplicates(BATCH_KEYS, keep="last")[
+        BATCH_KEYS + ["qty_mean", "qty_std"]
+    ]
+    hub_inv = (
+        hub_inventory.groupby(BATCH_KEYS)["qty"]
+        .sum()
+        .rename("hub_inventory")
+        .reset_index()
+    )
+
+    data = store_inv.merge(forecast, on=BATCH_KEYS).merge(
+        hub_inv, on=BATCH_KEYS, how="left"
+    )
+    quantity = SafetyStockModel._run_replenish_vectorized(
+        ForecastHolder._mean_std(data["qty_mean"].values, params),
+        ForecastHolder._mean_std(data["qty_std"].values, params),
+        data["store_inventory"].values,
+        data["hub_inventory"].fillna(0.0).values,
+        params,
+    )
+    return data[BATCH_KEYS].assign(quantity=quantity)
+
+
+def get_batch_storage_days(order_info, forecast, safety_days):
+    """
+    多门店批量获取 sku 的库存天数，规则同 get_storage_days
+    @param order_info: DataFrame, store_id, sku_id, store_inventory, replenishment
+    @param forecast: DataFrame, store_id, sku_id, qty_mean, qty_std
+    @param safety_days: int
+    @return np.ndarray 与 order_info 行对齐的库存天数
+    """
+    params = dict(SAFETY_STOCK_MODEL_CONFIG, safety_days=safety_days)
+    forecast = (
+        ForecastHolder()
+        .astype(forecast)
+        .drop_duplicates(BATCH_KEYS, keep="last")
+    )
+    daily_forecast = (
+        ForecastHolder._mean_std(forecast["qty_mean"].values, params)
+        / safety_days
+    )
+    daily_forecast = (
+        order_info[BATCH_KEYS]
+        .merge(
+            forecast[BATCH_KEYS].assign(daily_forecast=daily_forecast),
+            on=BATCH_KEYS,
+            how="left",
+        )["daily_forecast"]
+        .values
+    )
+
+    total_inventory = (
+        order_info["store_inventory"].astype(float).values
+        + order_info["replenishment"].astype(float).values
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        days = np.where(
+            daily_forecast > 0,
+            np.trunc(total_inventory / daily_forecast),
+            MAX_STORAGE_DAYS,
+        )
+    # sku_id 不在预测结果中返回 -1
+    return np.where(np.isnan(daily_forecast), -1, days).astype(int)
+
+
+def get_batch_storage_level(order_info, forecast):
+    """
+    多门店批量获取库存水平天数，规则同 get_storage_level
+    @param order_info: DataFrame, store_id, sku_id, store_inventory, replenishment
+    @param forecast: DataFrame, store_id, sku_id, qty_mean, qty_std
+    @return DataFrame index 为 store_id, columns: level_before, level_after
+    """
+    forecast = (
+        ForecastHolder()
+        .astype(forecast)
+        .drop_duplicates(BATCH_KEYS, keep="last")
+    )
+    # 预测值为负，当做 0 处理
+    forecast = forecast[BATCH_KEYS].assign(
+        daily_forecast=np.where(
+            forecast["qty_mean"] > 0, forecast["qty_mean"] / 7, 0
+        )
+    )
+    data = order_info[BATCH_KEYS + ["store_inventory", "replenishment"]].merge(
+        forecast, on=BATCH_KEYS, how="left"
+    )
+    data["inventory_after"] = data["store_inventory"] + data["replenishment"]
+    data["daily_forecast"] = data["daily_forecast"].fillna(0.0)
+
+    total = data.groupby("store_id")[
+        ["store_inventory", "inventory_after", "daily_forecast"]
+    ].sum()
+    forecast_total = total["daily_forecast"] + 1.0  # 避免除以0
+    return pd.DataFrame(
+        {
+            "level_before": total["store_inventory"] / forecast_total,
+            "level_after": total["inventory_after"] / forecast_total,
+        }
+    )
@@ -2,6 +2,8 @@
 from collections import defaultdict
 from copy import copy
 
+import numpy as np
+
 
 def ensure_float(value):
     try:
@@ -11,6 +13,26 @@ def ensure_float(value):
     return value
 
 
+def classify_freshness(inventory_days, shelf_life, thresholds, levels):
+    """
+    向量化计算 sku 新鲜度等级，新鲜度 = 库存天数（上传日期 - 生产日期）/ sku保质期，
+    按 thresholds 分段（右侧闭合，与 bisect.bisect 一致）映射到 levels
+    @param inventory_days: array, 上传日期 - 生产日期的天数
+    @param shelf_life: array, sku 保质期
+    @param thresholds: list, eg. [0, 2/3, 1]
+    @param levels: list, len(thresholds) + 1 个新鲜度等级
+    @return np.ndarray 新鲜度等级
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        freshness = np.asarray(inventory_days, dtype=float) / np.asarray(
+            shelf_life, dtype=float
+        )
+    # 二分查找找到对应所属范围索引，NaN 归入最后一档
+    return np.asarray(levels).take(
+        np.searchsorted(thresholds, freshness, side="right")
+    )
+
+
 def parse_expired_info(expired_info):
     """
     将坏货信息解析为前端需要的格式
@@ -0,0 +1,119 @@
+# coding: utf-8
+import contextlib
+import sys
+import types
+
+import pytest
+
+try:
+    import celery_tasks.email_tasks  # noqa: F401
+except ImportError:
+    # 邮件任务模块不在仓库中，导入 applications.user 时以不发送邮件的任务代替
+    class _NoEmailTask:
+        def delay(self, *args, **kwargs):
+            pass
+
+    email_tasks = types.ModuleType("celery_tasks.email_tasks")
+    email_tasks.send_reset_password_email = _NoEmailTask()
+    email_tasks.send_user_approved_email = _NoEmailTask()
+    email_tasks.send_module_apply_email = _NoEmailTask()
+    sys.modules["celery_tasks.email_tasks"] = email_tasks
+
+
+@pytest.fixture(scope="session")
+def app(tmp_path_factory):
+    """
+    sqlite + fakeredis 的 app，与压测相同的建表兼容处理
+    """
+    pytest.importorskip("fakeredis")
+    from benchmarks.load_test import (
+        create_load_test_app,
+        prepare_sqlite_schema,
+    )
+
+    database_path = tmp_path_factory.mktemp("db") / "test.db"
+    app = create_load_test_app("sqlite:///{}".format(database_path))
+    with app.app_context():
+        prepare_sqlite_schema()
+    return app
+
+
+@pytest.fixture
+def database(app):
+    """
+    每个测试单独建表，结束后删除所有表并清空 redis
+    """
+    from common import db, redis_client
+
+    with app.app_context():
+        db.create_all()
+        yield db
+        db.session.remove()
+        db.drop_all()
+        redis_client.flushdb()
+
+
+@pytest.fixture
+def planner_client(app, database):
+    """
+    写入 2 个门店、50 个 sku 的模拟数据，返回已登录计划员的 test client
+    """
+    from benchmarks.load_test import PLANNER_PASSWORD, seed_data
+
+    seed_data(stores=2, skus=50, planners=1, seed=0)
+    client = app.test_client()
+    response = client.post(
+        "/auth/login", json={"name": "planner0", "password": PLANNER_PASSWORD}
+    )
+    assert response.status_code == 200
+    return client
+
+
+# 登录用户加载（flask-login user_loader、flask-security 角色）查询的表，不计入接口查询次数
+LOGIN_USER_TABLES = {"user", "role", "users_roles"}
+
+
+@pytest.fixture
+def count_queries(app):
+    """
+    统计 with 代码块内执行的 sql，以 before_cursor_execute 事件记录到 QueryStats，
+    只读取登录用户、角色表的 SELECT 不统计，各接口的查询次数与用户是否已在当前 app context 中加载无关:
+
+        with count_queries() as query_stats:
+            client.get(...)
+        assert query_stats.count == 2
+    """
+    from sqlalchemy import event
+    from sqlalchemy.sql.expression import Select
+    from sqlalchemy.sql.util import find_tables
+
+    from common import db
+    from common.query_stats import QueryStats
+
+    def is_login_user_query(context):
+        statement = getattr(context.compiled, "statement", None)
+        if not isinstance(statement, Select):
+            return False
+        tables = {
+            table.name for table in find_tables(statement, include_joins=False)
+        }
+        return bool(tables) and tables <= LOGIN_USER_TABLES
+
+    @contextlib.contextmanager
+    def _count_queries():
+        query_stats = QueryStats()
+
+        def before_cursor_execute(
+            conn, cursor, statement, parameters, context, executemany
+        ):
+            if not is_login_user_query(context):
+                query_stats.record(statement, 0.0, 0)
+
+        engine = db.get_engine(app)
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield query_stats
+        finally:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+    return _count_queries
@@ -0,0 +1,32 @@
+# coding: utf-8
+import pandas as pd
+
+from applications.IR.optimization.service import BatchOptimizationService
+from applications.IR.forecast.service import ForecastService
+from benchmarks.load_test import seed_data
+from replenish.runner import ParallelReplenishRunner
+
+STORES = 4
+
+
+def test_parallel_results_equal_sequential(database):
+    seed_data(stores=STORES, skus=60, planners=1, seed=0)
+    service = BatchOptimizationService()
+    store_inventory_df = service.get_store_inventory()
+    forecast_df = ForecastService(service.version).get_forecast_results(
+        service.store_ids
+    )
+    hub_inventory_df = service.get_hub_inventory()
+
+    # 每个门店一个分片，2 个子进程交替计算
+    runner = ParallelReplenishRunner(max_workers=2, chunk_size=1)
+    parallel_order_df, parallel_level_df = service.cal_optimizations_parallel(
+        runner, store_inventory_df, forecast_df, hub_inventory_df
+    )
+    order_df, level_df = service.cal_optimizations(
+        store_inventory_df, forecast_df, hub_inventory_df
+    )
+
+    pd.testing.assert_frame_equal(parallel_order_df, order_df)
+    pd.testing.assert_frame_equal(parallel_level_df, level_df)
+    assert sorted(runner.timings) == sorted(service.store_ids)
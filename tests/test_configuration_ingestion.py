@@ -0,0 +1,69 @@
+# coding: utf-8
+import pandas as pd
+import pytest
+
+from applications.IR.api import config as api_config
+from applications.IR.configuration import config as configuration_config
+from applications.IR.configuration.service import ConfigurationService
+from applications.IR.invoicing import HubInventory
+from common import redis_client
+
+
+def write_hub_inventory(path, qty):
+    pd.DataFrame(
+        {
+            "sku_id": ["1001", "1002", "1003", "1004", "1005"],
+            "qty": qty,
+            "amount": 10.0,
+            "location_id": "H1",
+        }
+    ).to_csv(path, index=False)
+
+
+def get_progress():
+    return redis_client.hgetall(configuration_config.CONFIGURATION_REDIS_KEY)[
+        configuration_config.CONFIGURATION_FILE_PROGRESS_KEY.format(
+            file_name="hub_inventory"
+        )
+    ]
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    # 每 2 行一个分块并提交
+    monkeypatch.setitem(
+        configuration_config.CONFIGURATION_INGESTION_CONFIG, "chunk_size", 2
+    )
+    monkeypatch.setitem(
+        configuration_config.CONFIGURATION_INGESTION_CONFIG, "commit_size", 2
+    )
+
+
+def test_save_file_chunks(database, small_chunks, tmp_path):
+    file_path = str(tmp_path / "hub_inventory.csv")
+    write_hub_inventory(file_path, [1.0, 2.0, 3.0, 4.0, 5.0])
+
+    location_ids = ConfigurationService.save_file_chunks_to_db(
+        HubInventory, "hub_inventory", file_path
+    )
+    assert location_ids == ["H1"]
+    assert HubInventory.query.count() == 5
+    assert get_progress() == {"saved_rows": 5, "total_rows": 5}
+
+
+def test_failed_file_removes_committed_chunks(
+    database, small_chunks, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(api_config, "TMP_SAVE_PATH", str(tmp_path))
+    # 第 3 个分块 qty 为空，写入失败时前 2 个分块已提交
+    write_hub_inventory(
+        str(tmp_path / "hub_inventory.csv"), [1.0, 2.0, 3.0, 4.0, None]
+    )
+
+    result = ConfigurationService.save_file_to_db(
+        "hub_inventory.csv", "planner0", "2020-06-01 00:00:00"
+    )
+    assert not result["success"]
+    # session 已回滚，可以继续查询；已提交的分块被删除，重新上传不会重复写入
+    assert HubInventory.query.count() == 0
+    assert get_progress() == {"saved_rows": 0, "total_rows": 5}
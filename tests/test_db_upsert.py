@@ -0,0 +1,55 @@
+# coding: utf-8
+import datetime
+
+import pandas as pd
+import pytest
+
+from applications.IR.store import Store
+
+
+def gen_stores(store_ids, store_name):
+    return pd.DataFrame(
+        {
+            "store_id": store_ids,
+            "store_name": [
+                "{}{}".format(store_name, store_id) for store_id in store_ids
+            ],
+            "gsv": [float(store_id) for store_id in store_ids],
+            "province": "上海",
+            "city": "上海",
+            "region": "华东",
+            "opening_dte": datetime.datetime(2018, 1, 1),
+        }
+    )
+
+
+def query_stores():
+    return {store.store_id: store for store in Store.query.all()}
+
+
+@pytest.mark.parametrize("use_upsert", [True, False])
+def test_create_or_update(database, monkeypatch, use_upsert):
+    if not use_upsert:
+        # 不支持 upsert 的数据库，按批查询已存在的主键再分别更新、新增
+        monkeypatch.setattr(
+            Store, "_get_upsert_statement", lambda columns, primary_keys: None
+        )
+
+    Store.create_or_update(gen_stores([1, 2, 3], "门店"), batch_size=2)
+    created = {
+        store_id: (store.store_name, store.created_at, store.updated_at)
+        for store_id, store in query_stores().items()
+    }
+    assert sorted(created) == [1, 2, 3]
+    database.session.remove()
+
+    Store.create_or_update(gen_stores([2, 3, 4, 5], "新门店"), batch_size=2)
+    stores = query_stores()
+    assert sorted(stores) == [1, 2, 3, 4, 5]
+    assert stores[1].store_name == "门店1"
+    for store_id in (2, 3, 4, 5):
+        assert stores[store_id].store_name == "新门店{}".format(store_id)
+    for store_id in (2, 3):
+        # 更新不修改 created_at
+        assert stores[store_id].created_at == created[store_id][1]
+        assert stores[store_id].updated_at >= created[store_id][2]
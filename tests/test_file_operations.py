@@ -0,0 +1,25 @@
+# coding: utf-8
+import pandas as pd
+
+from common.file_operations import FileOperation
+
+
+def test_count_csv_rows_matches_chunk_reader(tmp_path):
+    file_path = str(tmp_path / "inventory.csv")
+    pd.DataFrame(
+        {
+            "sku_id": ["1001", "1002", "1003", "1004"],
+            "sku_name": ["a", "multi\nline\nname", 'quoted "b"', ""],
+            "qty": [1.0, 2.0, None, 4.0],
+        }
+    ).to_csv(file_path, index=False)
+    # 文件末尾的空行不计入
+    with open(file_path, "a") as f:
+        f.write("\n")
+
+    chunk_rows = sum(
+        len(chunk_df)
+        for chunk_df in FileOperation.read_csv_chunks(file_path, 2)
+    )
+    assert chunk_rows == 4
+    assert FileOperation.count_csv_rows(file_path) == chunk_rows
@@ -0,0 +1,50 @@
+# coding: utf-8
+import datetime
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from common.json_serializers import JSON_SERIALIZERS, _default, orjson
+
+
+def gen_df():
+    return pd.DataFrame(
+        {
+            "sku_id": ["1001", "1002", "1003"],
+            "unit_price": [0.1, 123456789.123456, np.nan],
+            "store_inventory": [1.25, 1e-7, 3.0],
+            "created_at": pd.to_datetime(
+                ["2020-05-20 08:30:00", "2020-05-20 08:30:00.123456", None]
+            ),
+            "production_dte": [
+                datetime.date(2020, 1, 1),
+                None,
+                datetime.date(2020, 3, 1),
+            ],
+        }
+    )
+
+
+@pytest.mark.parametrize("name", list(JSON_SERIALIZERS))
+def test_dumps_df_equals_record_dumps(name):
+    if name == "orjson" and orjson is None:
+        pytest.skip("orjson is not installed")
+
+    df = gen_df()
+    # 原 output_json 的 to_dict("record") + json.dumps 序列化结果，NaN / NaT 为 null
+    records = df.astype(object).where(pd.notnull(df), None).to_dict("records")
+    expected = json.loads(json.dumps(records, default=_default))
+    serializer = JSON_SERIALIZERS[name]()
+
+    records = json.loads(serializer.dumps_df(df))
+    assert records == expected
+    assert records[0]["created_at"] == "2020-05-20T08:30:00"
+    assert records[1]["unit_price"] == 123456789.123456
+
+    split = json.loads(serializer.dumps_df(df, orient="split"))
+    assert split["columns"] == df.columns.tolist()
+    assert [dict(zip(split["columns"], row)) for row in split["data"]] == (
+        expected
+    )
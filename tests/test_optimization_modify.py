@@ -0,0 +1,44 @@
+# coding: utf-8
+from applications.IR.optimization.config import OPTIMIZATION_STATUS
+from applications.IR.optimization.models import Optimization, OptimizedOrder
+
+
+def order_amount(order_id):
+    return sum(
+        (sku.unit_price or 0) * sku.replenishment
+        for sku in OptimizedOrder.query.filter_by(order_id=order_id)
+    )
+
+
+def test_modify_updates_order_amount_total(planner_client, database):
+    assert (
+        planner_client.post("/IR/optimizations/store/1", json={}).status_code
+        == 200
+    )
+    optimization = planner_client.get("/IR/optimizations/store/1").get_json()[
+        "data"
+    ]
+    sku_infos = optimization["optimized_sku_info"]
+
+    for sku_info, modify in zip(sku_infos[:3], [5, -2, 7]):
+        sku_modify = {
+            key: sku_info[key]
+            for key in (
+                "id",
+                "sku_id",
+                "optimized_replenishment",
+                "store_inventory",
+            )
+        }
+        sku_modify["modify"] = modify
+        response = planner_client.put(
+            "/IR/optimizations/sku-modify/1", json={"sku_modify": [sku_modify]}
+        )
+        assert response.status_code == 200
+
+    database.session.remove()
+    obj = Optimization.query.filter_by(order_id=optimization["order_id"]).one()
+    assert obj.status == OPTIMIZATION_STATUS.UNDETERMINED.value
+    assert abs(
+        obj.order_amount_total - order_amount(optimization["order_id"])
+    ) < 1e-6 * max(1, obj.order_amount_total)
@@ -0,0 +1,32 @@
+# coding: utf-8
+
+# 各接口执行的 sql 条数（不含登录用户加载），新增查询（eg. N+1 查询）时需确认后再修改
+EXPECTED_QUERY_COUNTS = {
+    "status": 2,
+    "detail": 2,
+    "estimate": 6,
+    "reset": 12,
+    "submit": 8,
+}
+
+
+def test_optimization_query_counts(planner_client, count_queries):
+    def request(method, url, **kwargs):
+        with count_queries() as query_stats:
+            response = getattr(planner_client, method)(url, **kwargs)
+        assert response.status_code == 200
+        assert response.get_json()["code"] in (200, 201)
+        return query_stats.count
+
+    query_counts = {}
+    query_counts["status"] = request("get", "/IR/optimizations/stores/status")
+    # 状态接口命中响应缓存时不查询数据库
+    assert request("get", "/IR/optimizations/stores/status") == 0
+
+    request("post", "/IR/optimizations/store/1", json={})
+    query_counts["detail"] = request("get", "/IR/optimizations/store/1")
+    query_counts["estimate"] = request("get", "/IR/optimizations/estimate/1")
+    query_counts["reset"] = request("get", "/IR/optimizations/reset/1")
+    query_counts["submit"] = request("get", "/IR/optimizations/submit/1")
+
+    assert query_counts == EXPECTED_QUERY_COUNTS
@@ -0,0 +1,77 @@
+# coding: utf-8
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from benchmarks import generators
+from replenish.service import (
+    get_expired_goods_info,
+    get_predict_quantity,
+    get_storage_days,
+)
+
+STORES = 32
+
+
+def gen_store_inputs(seed):
+    """
+    每个门店的 sku 数、安全天数各不相同，一半门店带库存批次，
+    数据互相覆盖时结果会与顺序计算不同
+    """
+    skus = 300 + 37 * seed
+    order_template = generators.gen_order_template(skus, seed)
+    return {
+        "order_template": order_template,
+        "forecast": generators.gen_forecast(skus, seed),
+        "hub_inventory": generators.gen_hub_inventory(skus, seed),
+        "history_inventory": generators.gen_history_inventory(skus, seed),
+        "safety_days": [7, 10, 14][seed % 3],
+        "with_cohorts": seed % 2 == 0,
+    }
+
+
+def run_store(store_input):
+    replenishment = get_predict_quantity(
+        store_input["order_template"],
+        store_input["forecast"],
+        store_input["hub_inventory"],
+        store_input["safety_days"],
+    )
+    order_info = generators.gen_order_info(
+        store_input["order_template"], replenishment
+    )
+    storage_days = get_storage_days(
+        order_info, store_input["forecast"], store_input["safety_days"]
+    )
+    inventory_cohorts = (
+        generators.gen_inventory_cohorts(order_info)
+        if store_input["with_cohorts"]
+        else None
+    )
+    expired_info = get_expired_goods_info(
+        order_info,
+        store_input["forecast"],
+        store_input["history_inventory"],
+        inventory_cohorts,
+    )
+    return replenishment, storage_days, expired_info
+
+
+@pytest.fixture(scope="module")
+def store_inputs():
+    return [gen_store_inputs(seed) for seed in range(STORES)]
+
+
+@pytest.mark.parametrize("max_workers", [4, 16])
+def test_thread_pool_results_equal_sequential(store_inputs, max_workers):
+    sequential = [run_store(store_input) for store_input in store_inputs]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # 每个门店提交多次，增加线程交错的机会
+        parallel = list(executor.map(run_store, store_inputs * 3))
+
+    for index, result in enumerate(parallel):
+        replenishment, storage_days, expired_info = result
+        expected = sequential[index % STORES]
+        assert replenishment == expected[0]
+        assert storage_days == expected[1]
+        assert expired_info == expected[2]
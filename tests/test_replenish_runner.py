@@ -0,0 +1,17 @@
+# coding: utf-8
+from replenish.runner import ParallelReplenishRunner
+
+
+def test_concat_results_without_stores():
+    order_df, storage_level_df = ParallelReplenishRunner.concat_results([])
+
+    assert order_df.empty and storage_level_df.empty
+    assert order_df.columns.tolist() == [
+        "store_id",
+        "sku_id",
+        "replenishment",
+        "storage_days",
+    ]
+    assert order_df["replenishment"].dtype.kind == "f"
+    assert order_df["storage_days"].dtype.kind == "i"
+    assert storage_level_df.columns.tolist() == ["level_before", "level_after"]
@@ -0,0 +1,90 @@
+# coding: utf-8
+import json
+
+import pandas as pd
+
+from applications.IR.api.cache import ResponseCacheService
+from applications.IR.api.config import RESPONSE_CACHE_NAMESPACE
+from applications.IR.invoicing.service import StoreInventoryService
+from benchmarks.load_test import seed_data
+from common.arrow_serializers import is_arrow_available, pa, pq
+from config import (
+    RESPONSE_ARROW_MIMETYPE,
+    RESPONSE_COLUMNAR_JSON_MIMETYPE,
+    RESPONSE_PARQUET_MIMETYPE,
+)
+
+
+def decode(mediatype, data):
+    if mediatype == RESPONSE_ARROW_MIMETYPE:
+        return pa.ipc.open_stream(data).read_all()
+    if mediatype == RESPONSE_PARQUET_MIMETYPE:
+        return pq.read_table(pa.BufferReader(data))
+    return json.loads(data)
+
+
+def assert_same_body(mediatype, body, expected):
+    if mediatype in (RESPONSE_ARROW_MIMETYPE, RESPONSE_PARQUET_MIMETYPE):
+        assert body.equals(expected, check_metadata=True)
+    else:
+        assert body == expected
+
+
+def test_dumps_loads_dataframe():
+    df = pd.DataFrame(
+        {
+            "sku_id": ["1001", "1002"],
+            "qty": [1, 2],
+            "unit_price": [0.1, None],
+            "date": pd.to_datetime(["2020-05-20", None]),
+            "is_seasonal": [True, False],
+        }
+    )
+    cached = ResponseCacheService.loads(ResponseCacheService.dumps(df))
+    pd.testing.assert_frame_equal(cached, df)
+
+    data = {"stores": [1, 2]}
+    assert ResponseCacheService.loads(ResponseCacheService.dumps(data)) == (
+        data
+    )
+
+
+def test_cached_dataframe_for_each_format(app, database, monkeypatch):
+    seed_data(2, 50, 1, 0)
+    mediatypes = ["application/json", RESPONSE_COLUMNAR_JSON_MIMETYPE]
+    if is_arrow_available():
+        mediatypes += [RESPONSE_ARROW_MIMETYPE, RESPONSE_PARQUET_MIMETYPE]
+
+    calls = []
+    get_last_store_inventory = StoreInventoryService.get_last_store_inventory
+
+    def counted(self, *args, **kwargs):
+        calls.append(self.store_id)
+        return get_last_store_inventory(self, *args, **kwargs)
+
+    monkeypatch.setattr(
+        StoreInventoryService, "get_last_store_inventory", counted
+    )
+
+    client = app.test_client()
+
+    def get_body(mediatype):
+        response = client.get(
+            "/IR/inventory/store/1", headers={"Accept": mediatype}
+        )
+        assert response.status_code == 200
+        assert response.mimetype == mediatype
+        return decode(mediatype, response.data)
+
+    expected = {}
+    for mediatype in mediatypes:
+        # 失效缓存后第一次请求不命中，第二次命中缓存，返回结果一致
+        ResponseCacheService.invalidate(RESPONSE_CACHE_NAMESPACE.INVENTORY)
+        expected[mediatype] = get_body(mediatype)
+        assert_same_body(mediatype, get_body(mediatype), expected[mediatype])
+    assert len(calls) == len(mediatypes)
+
+    # 各返回格式共用一份缓存：命中其他格式写入的缓存时结果也一致
+    for mediatype in mediatypes:
+        assert_same_body(mediatype, get_body(mediatype), expected[mediatype])
+    assert len(calls) == len(mediatypes)
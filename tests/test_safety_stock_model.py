@@ -0,0 +1,50 @@
+# coding: utf-8
+import numpy as np
+import pytest
+
+from benchmarks import generators
+from replenish.data_holder import (
+    ForecastHolder,
+    HubInventoryHolder,
+    OrderTemplateHolder,
+)
+from replenish.model.safety_stock_model import SafetyStockModel
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+@pytest.mark.parametrize("safety_days", [7, 14])
+def test_vectorized_replenish_equals_reference(seed, safety_days):
+    skus = 2000
+    order_template_holder = OrderTemplateHolder()
+    forecast_holder = ForecastHolder()
+    hub_inv_holder = HubInventoryHolder()
+    order_template_holder.load_and_process(
+        generators.gen_order_template(skus, seed)
+    )
+    forecast_holder.load_and_process(generators.gen_forecast(skus, seed))
+    hub_inv_holder.load_and_process(generators.gen_hub_inventory(skus, seed))
+
+    model = SafetyStockModel(safety_days)
+    vectorized = model.run(
+        order_template_holder, forecast_holder, hub_inv_holder
+    )
+
+    # 对照实现只计算同时在订单模板和预测中的 sku，与 run 一致
+    store_inv = order_template_holder.store_sku_inv
+    forecast_data = {
+        sku_id: mean_std
+        for sku_id, mean_std in forecast_holder.get_forecast_mean_std(
+            model.params
+        ).items()
+        if sku_id in store_inv
+    }
+    reference = model._run_replenish(
+        forecast_data, store_inv, hub_inv_holder.data, model.params,
+    )
+
+    assert vectorized.keys() == reference.keys()
+    sku_ids = list(reference)
+    np.testing.assert_allclose(
+        [vectorized[sku_id] for sku_id in sku_ids],
+        [reference[sku_id] for sku_id in sku_ids],
+    )